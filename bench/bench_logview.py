@@ -0,0 +1,76 @@
+"""VIEW LOGS latency/memory: legacy f.read()[-3800:] vs tail-seek logview.
+
+Usage: python -m bench.bench_logview [--size-mb 1024] [--path /tmp/big.log] [--skip-legacy]
+"""
+import os
+import sys
+import time
+import argparse
+import resource
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from manager import logview
+
+
+def make_log(path, size_mb):
+    if os.path.exists(path) and os.path.getsize(path) >= size_mb * 1024 * 1024:
+        return
+    block = "".join(
+        f"2026-01-01 00:00:{i % 60:02d} INFO worker-{i % 7} handled update id={i} ok\n" for i in range(16000)
+    ).encode()
+    with open(path, "wb") as f:
+        written = 0
+        while written < size_mb * 1024 * 1024:
+            f.write(block)
+            written += len(block)
+
+
+def legacy(path):
+    with open(path, "r", errors="ignore") as f:
+        return f.read()[-3800:]
+
+
+def measure(fn, repeat):
+    tracemalloc.start()
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    samples.sort()
+    return samples[len(samples) // 2], samples[-1], peak
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--size-mb", type=int, default=1024)
+    ap.add_argument("--path", default="/tmp/manager_bench.log")
+    ap.add_argument("--skip-legacy", action="store_true")
+    args = ap.parse_args()
+
+    make_log(args.path, args.size_mb)
+    size = os.path.getsize(args.path)
+    print(f"log: {args.path} ({size / 1024 / 1024:.0f} MB)")
+
+    cases = [
+        ("tail page (latest)", lambda: logview.read_page(args.path), 200),
+        ("page 10k pages back", lambda: logview.read_page(args.path, size - 10000 * logview.PAGE_BYTES), 200),
+        ("grep miss (64MB budget)", lambda: logview.grep(args.path, "no-such-text"), 3),
+        ("grep hit (latest 30)", lambda: logview.grep(args.path, "worker-3"), 20),
+    ]
+    if not args.skip_legacy:
+        cases.append(("legacy f.read()[-3800:]", lambda: legacy(args.path), 2))
+
+    print(f"{'case':<26} {'p50':>10} {'max':>10} {'peak alloc':>12}")
+    for name, fn, repeat in cases:
+        p50, worst, peak = measure(fn, repeat)
+        print(f"{name:<26} {p50 * 1e3:>8.2f}ms {worst * 1e3:>8.2f}ms {peak / 1024:>10.0f}KB")
+    print(f"process peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""Offline manager simulation: fake Telegram layer se hosting.py ke hot paths.
+
+Scenarios (temp working dir mein, network nahi):
+  keys     - check_key handler (is_valid_key / redeem) valid + invalid keys
+  uploads  - handle_document: naye files + duplicate re-uploads
+  buttons  - button(): status / files / file| / ar| mix, parallel users
+  logview  - VIEW LOGS (logs| button + log_page) bade log files pe
+  store    - StateStore put throughput (save_all ki jagah) + compaction
+  start    - start_process + stub bots (time-to-running), phir bulk stop
+
+Har scenario: throughput, p50/p99 latency, event loop blocking (max / total),
+peak RSS. --save-baseline se JSON likho, --baseline se compare: regression pe exit 1.
+
+Usage: python -m bench.bench_manager [--users 200] [--keys 2000] [--files 3] [--bots 20]
+       [--log-mb 20] [--ops 2000] [--concurrency 32] [--api-ms 0]
+       [--scenarios keys,uploads,buttons,logview,store,start]
+       [--save-baseline bench/baseline.json | --baseline bench/baseline.json --tolerance 0.25]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import resource
+import tempfile
+from types import SimpleNamespace as NS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("keys", "uploads", "buttons", "logview", "store", "start")
+h = None  # hosting module; env + cwd set karke import hota hai (main mein)
+
+
+# ---------- fake Telegram layer ----------
+class FakeBot:
+    def __init__(self, api_ms):
+        self.api = api_ms / 1000
+        self.calls = 0
+
+    async def _call(self, *args, **kwargs):
+        self.calls += 1
+        if self.api:
+            await asyncio.sleep(self.api)
+        return NS(message_id=self.calls)
+
+    send_message = edit_message_text = send_document = _call
+
+
+class FakeMessage:
+    def __init__(self, bot, chat_id, text=None, document=None):
+        self.bot = bot
+        self.chat = NS(id=chat_id)
+        self.text = text
+        self.document = document
+
+    async def reply_text(self, text, **kwargs):
+        return await self.bot._call()
+
+
+class FakeQuery:
+    def __init__(self, bot, uid, data):
+        self.bot = bot
+        self.data = data
+        self.from_user = NS(id=uid, first_name=f"u{uid}", username=None)
+        self.message = FakeMessage(bot, uid)
+
+    async def answer(self, *args, **kwargs):
+        return True
+
+    async def edit_message_text(self, text, **kwargs):
+        return await self.bot._call()
+
+
+class FakeDocument:
+    def __init__(self, name, data):
+        self.file_name = name
+        self.file_id = f"fid-{name}"
+        self.file_size = len(data)
+        self.data = data
+
+    async def get_file(self):
+        data = self.data
+
+        async def download_to_drive(path):
+            with open(path, "wb") as f:
+                f.write(data)
+        return NS(download_to_drive=download_to_drive)
+
+
+def user(uid):
+    return NS(id=uid, first_name=f"u{uid}", username=None)
+
+
+def message_update(bot, uid, text=None, document=None):
+    return NS(message=FakeMessage(bot, uid, text, document), effective_user=user(uid), effective_chat=NS(id=uid))
+
+
+def callback_update(bot, uid, data):
+    return NS(callback_query=FakeQuery(bot, uid, data), effective_user=user(uid), effective_chat=NS(id=uid))
+
+
+def context(bot, args=()):
+    return NS(bot=bot, args=list(args), application=NS(create_task=asyncio.create_task))
+
+
+# ---------- measurement ----------
+class LoopMonitor:
+    """Chhote sleeps kitne late jaagte hain = event loop kitna block hua."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.reset()
+
+    def reset(self):
+        self.max = 0.0
+        self.total = 0.0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            t0 = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - t0 - self.interval
+            if lag > 0.001:
+                self.total += lag
+                self.max = max(self.max, lag)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KB
+
+
+async def measure(monitor, n, op, concurrency=1):
+    """op(i) coroutine n baar, concurrency workers se; stats dict."""
+    lat = []
+    it = iter(range(n))
+
+    async def worker():
+        for i in it:
+            t = time.perf_counter()
+            await op(i)
+            lat.append(time.perf_counter() - t)
+
+    await asyncio.sleep(monitor.interval * 3)  # setup (log files, keys) ka block is scenario mein na gine
+    monitor.reset()
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - t0
+    lat.sort()
+
+    def pct(p):
+        return lat[min(len(lat) - 1, int(len(lat) * p))] * 1000 if lat else 0.0
+
+    return {
+        "n": len(lat),
+        "ops_s": len(lat) / elapsed if elapsed else 0.0,
+        "p50_ms": pct(0.50),
+        "p99_ms": pct(0.99),
+        "block_max_ms": monitor.max * 1000,
+        "block_total_ms": monitor.total * 1000,
+        "rss_mb": peak_rss_mb(),
+    }
+
+
+# ---------- scenarios ----------
+def users(args):
+    return [10_000 + i for i in range(args.users)]
+
+
+async def scenario_keys(bot, monitor, args):
+    keys = h.key_index.create(30, 3, "bench keys", h.DEFAULT_TIER, n=args.keys)
+    for k in keys:
+        h.save_key(k)
+    uids = users(args)
+
+    async def op(i):
+        key = keys[i % len(keys)] if i % 4 else "INVALIDKEY000000"
+        update = message_update(bot, uids[i % len(uids)], text=key)
+        await h.check_key(update, context(bot))
+
+    return await measure(monitor, args.ops, op)
+
+
+async def scenario_uploads(bot, monitor, args):
+    for uid in users(args):
+        h.authorized_users.add(str(uid))
+    docs = [(uid, f"bot{j}.py") for uid in users(args) for j in range(args.files)]
+
+    async def op(i):
+        uid, name = docs[i % len(docs)]  # i >= len(docs): same content dobara (dedup path)
+        data = f"# {uid}/{name}\nimport time\nwhile True:\n    time.sleep(1)\n".encode()
+        await h.handle_document(message_update(bot, uid, document=FakeDocument(name, data)), context(bot))
+
+    n = len(docs) + len(docs) // 10
+    return await measure(monitor, n, op, args.concurrency)
+
+
+async def scenario_buttons(bot, monitor, args):
+    owned = [(uid, [b.id for b in h.registry.of_owner(uid)]) for uid in users(args)]
+    owned = [(uid, ids) for uid, ids in owned if ids]
+    rnd = random.Random(1)
+
+    async def op(i):
+        uid, ids = owned[i % len(owned)]
+        bid = rnd.choice(ids)
+        data = rnd.choice(("status", "files", f"file|{bid}", f"file|{bid}", f"ar|{bid}"))
+        await h.button(callback_update(bot, uid, data), context(bot))
+
+    return await measure(monitor, args.ops, op, args.concurrency)
+
+
+def make_log(path, size_mb):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    block = "".join(f"2026-01-01 00:00:{i % 60:02d} INFO worker handled update id={i} ok\n"
+                    for i in range(16000)).encode()
+    with open(path, "wb") as f:
+        for _ in range(max(1, int(size_mb * 1024 * 1024 // len(block)))):
+            f.write(block)
+
+
+async def scenario_logview(bot, monitor, args):
+    bots = [b for uid in users(args)[:3] for b in h.registry.of_owner(uid)[:1]]
+    for b in bots:
+        make_log(h.log_path(b), args.log_mb)
+
+    async def op(i):
+        b = bots[i % len(bots)]
+        if i % 2:
+            await h.button(callback_update(bot, int(b.owner), f"logs|{b.id}"), context(bot))
+        else:
+            h.log_page(b, None, i % 3)  # purane pages bhi (end=None, seg)
+
+    return await measure(monitor, max(50, args.ops // 10), op)
+
+
+async def scenario_store(bot, monitor, args):
+    async def op(i):
+        h.store.put("bot_settings", f"bench-{i % 5000}", {"autorestart": bool(i % 2), "i": i})
+
+    result = await measure(monitor, args.ops * 5, op)
+    t = time.perf_counter()
+    await h.store.compact()
+    result["compact_ms"] = (time.perf_counter() - t) * 1000
+    result["block_max_ms"] = max(result["block_max_ms"], monitor.max * 1000)
+    return result
+
+
+async def scenario_start(bot, monitor, args):
+    bots = [b for uid in users(args) for b in h.registry.of_owner(uid)][:args.bots]
+
+    async def op(i):
+        b = bots[i]
+        job = await h.start_process(b.id, bot, int(b.owner), int(b.owner))
+        await job.done.wait()
+        if b.id not in h.running:
+            raise RuntimeError(f"{b.name} start nahi hua")
+
+    result = await measure(monitor, len(bots), op, args.concurrency)
+    t = time.perf_counter()
+    await h.bulk_action("stop", bots, 0)
+    result["stop_all_ms"] = (time.perf_counter() - t) * 1000
+    return result
+
+
+# ---------- baseline ----------
+def compare(results, baseline, tol):
+    """(metric, old, new) regressions; chhote absolute farak (noise) ignore."""
+    bad = []
+    for name, r in results.items():
+        b = baseline.get("results", {}).get(name)
+        if not b:
+            continue
+        if r["ops_s"] < b["ops_s"] * (1 - tol):
+            bad.append((f"{name}.ops_s", b["ops_s"], r["ops_s"]))
+        for k, floor in (("p99_ms", 1.0), ("block_max_ms", 5.0), ("rss_mb", 20.0)):
+            if r[k] > b[k] * (1 + tol) and r[k] - b[k] > floor:
+                bad.append((f"{name}.{k}", b[k], r[k]))
+    return bad
+
+
+def report(results, baseline):
+    print(f"{'scenario':<9} {'n':>6} {'ops/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'block max':>10} {'block tot':>10} {'rss MB':>7}")
+    for name, r in results.items():
+        print(f"{name:<9} {r['n']:>6} {r['ops_s']:>9.1f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+              f"{r['block_max_ms']:>10.1f} {r['block_total_ms']:>10.1f} {r['rss_mb']:>7.1f}")
+        extra = {k: v for k, v in r.items() if k.endswith("_ms") and k not in
+                 ("p50_ms", "p99_ms", "block_max_ms", "block_total_ms")}
+        for k, v in extra.items():
+            print(f"{'':<9} {k}: {v:.1f}")
+        old = baseline.get("results", {}).get(name) if baseline else None
+        if old:
+            print(f"{'':<9} baseline: {old['ops_s']:.1f} ops/s, p99 {old['p99_ms']:.2f} ms, "
+                  f"block max {old['block_max_ms']:.1f} ms")
+
+
+async def run(args):
+    bot = FakeBot(args.api_ms)
+    h.tg_bot = bot
+    h.supervisor.start()
+    h.outbox.start(bot)
+    monitor = LoopMonitor()
+    watcher = asyncio.create_task(monitor.run())
+    results = {}
+    try:
+        for name in args.scenarios.split(","):
+            results[name] = await globals()[f"scenario_{name}"](bot, monitor, args)
+            print(f"  {name}: done ({results[name]['n']} ops)", flush=True)
+    finally:
+        watcher.cancel()
+        for bid in list(h.running):
+            await h.stop_process(bid)
+        h.store.close()
+    return results
+
+
+def main():
+    global h
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=200)
+    ap.add_argument("--keys", type=int, default=2000)
+    ap.add_argument("--files", type=int, default=3, help="har user ke .py files")
+    ap.add_argument("--bots", type=int, default=20, help="start scenario: kitne stub bots")
+    ap.add_argument("--log-mb", type=float, default=20)
+    ap.add_argument("--ops", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=32, help="parallel users (updates)")
+    ap.add_argument("--api-ms", type=float, default=0, help="fake Telegram API call latency")
+    ap.add_argument("--warm", type=int, default=0, help="WARM_POOL (start scenario)")
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--workdir", help="default: temp dir")
+    ap.add_argument("--baseline", help="is JSON se compare; regression pe exit 1")
+    ap.add_argument("--save-baseline", help="results is JSON mein likho")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    args = ap.parse_args()
+    for name in args.scenarios.split(","):
+        if name not in SCENARIOS:
+            ap.error(f"unknown scenario {name}")
+    baseline_path = args.baseline and os.path.abspath(args.baseline)
+    save_path = args.save_baseline and os.path.abspath(args.save_baseline)
+
+    # hosting import pe hi dirs/state banate hain -> pehle env + cwd
+    workdir = args.workdir or tempfile.mkdtemp(prefix="manager-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    os.environ.update(BOT_TOKEN="123456:bench", LOG_GC_ID="-100", OWNER_ID="1", STOP_TIMEOUT="2",
+                      BOT_CGROUPS="0", WARM_POOL=str(args.warm), MAX_UPLOAD_MB="5",
+                      PYTHONPATH=ROOT)  # warm children: -m manager.warmstart
+    sys.path.insert(0, ROOT)
+    import hosting
+    h = hosting
+
+    scale = {k: getattr(args, k) for k in ("users", "keys", "files", "bots", "log_mb", "ops", "concurrency", "api_ms", "warm")}
+    print(f"workdir: {workdir}\nscale: {scale}")
+    results = asyncio.run(run(args))
+
+    baseline = None
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != scale:
+            print(f"⚠️ baseline scale alag hai: {baseline.get('scale')}")
+    print()
+    report(results, baseline)
+
+    if save_path:
+        with open(save_path, "w") as f:
+            json.dump({"scale": scale, "python": sys.version.split()[0], "results": results}, f, indent=1)
+        print(f"\nbaseline saved: {save_path}")
+    if baseline:
+        bad = compare(results, baseline, args.tolerance)
+        if bad:
+            print(f"\n❌ {len(bad)} regression(s) (tolerance {args.tolerance:.0%}):")
+            for metric, old, new in bad:
+                print(f"  {metric}: {old:.2f} -> {new:.2f}")
+            sys.exit(1)
+        print(f"\n✅ baseline ke andar (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
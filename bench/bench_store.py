@@ -0,0 +1,107 @@
+"""Mutation latency: legacy save_all() full rewrite vs write-ahead StateStore.
+
+Usage: python -m bench.bench_store [--sizes 10000,100000,1000000] [--fsync]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from manager.store import StateStore
+
+TABLES = {
+    "keys": ("keys.json", dict),
+    "user_files": ("user_files.json", dict),
+    "chat_logs": ("chat_logs.json", dict),
+    "authorized_users": ("authorized_users.json", set),
+}
+
+
+def make_state(n):
+    exp = datetime.utcnow() + timedelta(days=30)
+    keys = {f"K{i:015d}": {"expiry": exp, "max_bots": 3, "name": f"user{i}", "used_by": [str(i)]} for i in range(n)}
+    user_files = {str(i): [f"bot{i}.py"] for i in range(n)}
+    chat_logs = {str(i): [f"bot{i}.py"] for i in range(n)}
+    authorized = {str(i) for i in range(n)}
+    return keys, user_files, chat_logs, authorized
+
+
+def legacy_save_all(d, keys, user_files, chat_logs, authorized_users):
+    # Baseline commit ka save_all(), as-is
+    raw_keys = {k: {**v, "expiry": v["expiry"].isoformat()} for k, v in keys.items()}
+    with open(f"{d}/keys.json", "w") as f: json.dump(raw_keys, f, indent=2)
+    with open(f"{d}/user_files.json", "w") as f: json.dump(user_files, f, indent=2)
+    with open(f"{d}/chat_logs.json", "w") as f: json.dump(chat_logs, f, indent=2)
+    with open(f"{d}/authorized_users.json", "w") as f: json.dump(list(authorized_users), f, indent=2)
+
+
+def pct(samples, p):
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(len(s) * p))]
+
+
+def bench_legacy(n, state, budget):
+    samples = []
+    with tempfile.TemporaryDirectory() as d:
+        deadline = time.perf_counter() + budget
+        while len(samples) < 3 or (time.perf_counter() < deadline and len(samples) < 50):
+            t = time.perf_counter()
+            legacy_save_all(d, *state)
+            samples.append(time.perf_counter() - t)
+    return samples
+
+
+def bench_store(n, state, mutations, fsync):
+    keys = state[0]
+    samples = []
+    with tempfile.TemporaryDirectory() as d:
+        legacy_save_all(d, *state)  # import path: purani JSON files
+        store = StateStore(d, TABLES, fsync=fsync, compact_after=10 ** 9)
+        t = time.perf_counter()
+        store.load()
+        load_s = time.perf_counter() - t
+        names = list(keys)
+        for _ in range(mutations):
+            k = random.choice(names)
+            v = {**keys[k], "expiry": keys[k]["expiry"].isoformat(), "used_by": keys[k]["used_by"] + ["999"]}
+            t = time.perf_counter()
+            store.put("keys", k, v)
+            samples.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        asyncio.run(store.compact())
+        compact_s = time.perf_counter() - t
+        store.close()
+    return samples, load_s, compact_s
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10000,100000,1000000")
+    ap.add_argument("--mutations", type=int, default=20000)
+    ap.add_argument("--budget", type=float, default=10.0, help="seconds per size for legacy runs")
+    ap.add_argument("--fsync", action="store_true")
+    args = ap.parse_args()
+
+    print(f"{'records':>9} | {'save_all p50':>12} {'p99':>10} | {'journal p50':>11} {'p99':>10} | {'speedup':>9} | {'load':>7} {'compact':>8}")
+    for n in [int(x) for x in args.sizes.split(",")]:
+        state = make_state(n)
+        legacy = bench_legacy(n, state, args.budget)
+        journal, load_s, compact_s = bench_store(n, state, args.mutations, args.fsync)
+        lp50, jp50 = statistics.median(legacy), statistics.median(journal)
+        print(
+            f"{n:>9} | {lp50 * 1e3:>10.1f}ms {pct(legacy, 0.99) * 1e3:>8.1f}ms | "
+            f"{jp50 * 1e6:>9.1f}us {pct(journal, 0.99) * 1e6:>8.1f}us | "
+            f"{lp50 / jp50:>8.0f}x | {load_s:>6.2f}s {compact_s:>7.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
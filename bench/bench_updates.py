@@ -0,0 +1,171 @@
+"""Update dispatch load test: polling vs webhook, sequential vs per-user concurrent.
+
+Synthetic callback_query Update JSON replay hota hai - webhook mode mein local
+aiohttp server pe HTTP POST (secret header ke saath), polling mode mein fake
+getUpdates ke through. Telegram API nahi chhuta: handler sirf --work-ms sleep
+karta hai (ek API round trip jaisa). Latency = update bhejne se handler khatam.
+
+Usage: python -m bench.bench_updates [--updates 2000] [--users 50] [--work-ms 50]
+       [--modes polling,webhook] [--rtt-ms 20] [--connections 40]
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+from telegram import Update, User
+from telegram.ext import Application, CallbackQueryHandler, ExtBot
+
+from manager import webhook
+
+SECRET = "bench-secret"
+
+
+def make_update(uid, user_id):
+    return {
+        "update_id": uid,
+        "callback_query": {
+            "id": str(uid),
+            "from": {"id": user_id, "is_bot": False, "first_name": f"u{user_id}"},
+            "chat_instance": str(user_id),
+            "data": f"status|{uid}",
+            "message": {"message_id": uid, "date": 0,
+                        "chat": {"id": user_id, "type": "private"}},
+        },
+    }
+
+
+class FakeBot(ExtBot):
+    """getUpdates ek in-memory queue se (rtt ke saath); baaki network calls no-op."""
+
+    def __init__(self, rtt):
+        super().__init__("123456:bench")
+        self._pending = []
+        self._arrived = asyncio.Event()
+        self._rtt = rtt
+
+    def push(self, data):
+        self._pending.append(data)
+        self._arrived.set()
+
+    async def get_me(self, *args, **kwargs):
+        self._bot_user = User(1, "bench", True, username="bench_bot")
+        return self._bot_user
+
+    async def delete_webhook(self, *args, **kwargs):
+        return True
+
+    async def set_webhook(self, *args, **kwargs):
+        return True
+
+    async def get_updates(self, offset=None, limit=100, timeout=None, **kwargs):
+        await asyncio.sleep(self._rtt)
+        if not self._pending and timeout:
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        batch, self._pending = self._pending[:limit], self._pending[limit:]
+        return [Update.de_json(d, self) for d in batch]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run_case(mode, concurrent, args):
+    bot = FakeBot(args.rtt_ms / 1000)
+    builder = Application.builder().bot(bot)
+    if concurrent:
+        builder = builder.concurrent_updates(webhook.PerUserProcessor(args.concurrency))
+    app = builder.build()
+
+    sent, latency, last_seen = {}, [], {}
+    out_of_order = 0
+    done = asyncio.Event()
+
+    async def handle(update, context):
+        nonlocal out_of_order
+        await asyncio.sleep(args.work_ms / 1000)
+        uid, user = update.update_id, update.effective_user.id
+        if last_seen.get(user, -1) > uid:
+            out_of_order += 1
+        last_seen[user] = uid
+        latency.append(time.perf_counter() - sent[uid])
+        if len(latency) == args.updates:
+            done.set()
+
+    app.add_handler(CallbackQueryHandler(handle))
+    payloads = [make_update(i, 1000 + i % args.users) for i in range(args.updates)]
+
+    runner = None
+    await app.initialize()
+    await app.start()
+    try:
+        t0 = time.perf_counter()
+        if mode == "polling":
+            await app.updater.start_polling(poll_interval=0, timeout=10)
+            for d in payloads:
+                sent[d["update_id"]] = time.perf_counter()
+                bot.push(d)
+        else:
+            listen = f"127.0.0.1:{free_port()}"
+            runner = await webhook.serve(app, listen, "/telegram", SECRET)
+            url = f"http://{listen}/telegram"
+            conn = aiohttp.TCPConnector(limit=args.connections)  # Telegram ka max_connections
+            async with aiohttp.ClientSession(connector=conn) as session:
+                async def post(d):
+                    sent[d["update_id"]] = time.perf_counter()
+                    async with session.post(url, json=d, headers={webhook.SECRET_HEADER: SECRET}) as r:
+                        assert r.status == 200, r.status
+
+                await asyncio.gather(*(post(d) for d in payloads))
+        await asyncio.wait_for(done.wait(), args.timeout)
+        elapsed = time.perf_counter() - t0
+    finally:
+        if runner:
+            await runner.cleanup()
+        if app.updater.running:
+            await app.updater.stop()
+        await app.stop()
+        await app.shutdown()
+
+    latency.sort()
+
+    def pct(p):
+        return latency[min(len(latency) - 1, int(len(latency) * p))] * 1000
+
+    return args.updates / elapsed, pct(0.50), pct(0.99), out_of_order
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--updates", type=int, default=2000)
+    ap.add_argument("--users", type=int, default=50)
+    ap.add_argument("--work-ms", type=float, default=50, help="handler ka simulated API time")
+    ap.add_argument("--rtt-ms", type=float, default=20, help="polling: getUpdates round trip")
+    ap.add_argument("--connections", type=int, default=40, help="webhook: parallel POSTs")
+    ap.add_argument("--concurrency", type=int, default=64, help="CONCURRENT_UPDATES")
+    ap.add_argument("--modes", default="polling,webhook")
+    ap.add_argument("--timeout", type=float, default=600)
+    args = ap.parse_args()
+
+    print(f"{args.updates} updates, {args.users} users, handler {args.work_ms:.0f} ms")
+    print(f"{'mode':<10} {'dispatch':<12} {'updates/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'reordered':>10}")
+    for mode in args.modes.split(","):
+        for concurrent in (False, True):
+            rate, p50, p99, bad = asyncio.run(run_case(mode, concurrent, args))
+            label = "per-user" if concurrent else "sequential"
+            print(f"{mode:<10} {label:<12} {rate:>10.1f} {p50:>9.1f} {p99:>9.1f} {bad:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Bot startup latency: cold `python -u bot.py` vs WarmPool handoff.
+
+Latency = spawn/handoff call se script ki pehli line (heavy imports ke baad) tak.
+Test script telegram + aiohttp import karta hai (jo installed ho), jaise asli bots.
+
+Usage: python -m bench.bench_warmstart [--runs 20] [--pool 2] [--preload telegram,telegram.ext,aiohttp]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -m manager.warmstart ke liye
+
+from manager.zygote import WarmPool
+from manager.limits import Limiter
+
+SCRIPT = """import time
+t = time.time()
+for name in {imports!r}:
+    try:
+        __import__(name)
+    except ImportError:
+        pass
+print("READY", time.time(), t, flush=True)
+"""
+
+
+def ready_at(log, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if os.path.exists(log):  # warm child log khud banata hai
+            with open(log) as f:
+                for line in f:
+                    # sirf poori line (child abhi likh raha ho sakta hai)
+                    if line.startswith("READY") and line.endswith("\n"):
+                        try:
+                            return float(line.split()[1])
+                        except (IndexError, ValueError):
+                            pass
+        time.sleep(0.002)
+    raise TimeoutError(log)
+
+
+def cold(script, log):
+    with open(log, "a") as f:
+        t0 = time.time()
+        proc = subprocess.Popen([sys.executable, "-u", script], stdout=f, stderr=f, start_new_session=True)
+    ready = ready_at(log)
+    proc.wait()
+    return ready - t0
+
+
+def warm(pool, script, log, limits):
+    t0 = time.time()
+    proc = pool.take(sys.executable)
+    if proc is None:
+        raise RuntimeError("pool khaali - --settle badhao")
+    pool.handoff(proc, script, log, limits)
+    ready = ready_at(log)
+    proc.wait()
+    return ready - t0
+
+
+def summary(name, samples):
+    samples = sorted(samples)
+    p = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+    print(f"{name:<6} p50 {p(0.5):8.1f} ms   p99 {p(0.99):8.1f} ms   min {samples[0] * 1000:8.1f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=20)
+    ap.add_argument("--pool", type=int, default=2)
+    ap.add_argument("--preload", default="telegram,telegram.ext,aiohttp,requests")
+    ap.add_argument("--settle", type=float, default=3.0, help="spare ko imports khatam karne ka time")
+    args = ap.parse_args()
+    preload = args.preload.split(",")
+
+    tmp = tempfile.mkdtemp(prefix="warmstart-")
+    script = os.path.join(tmp, "bot.py")
+    with open(script, "w") as f:
+        f.write(SCRIPT.format(imports=preload))
+    limits = Limiter(use_cgroups=False).spec({"nofile": 1024})
+
+    cold_s = []
+    for i in range(args.runs):
+        cold_s.append(cold(script, os.path.join(tmp, f"cold{i}.log")))
+
+    pool = WarmPool(args.pool, preload)
+    for _ in range(args.pool):
+        pool.fill(sys.executable)
+    warm_s = []
+    try:
+        for i in range(args.runs):
+            time.sleep(args.settle)  # steady state: restart ke beech spare warm ho chuka
+            warm_s.append(warm(pool, script, os.path.join(tmp, f"warm{i}.log"), limits))
+    finally:
+        pool.close()
+
+    print(f"{args.runs} starts, preload: {', '.join(preload)}")
+    summary("cold", cold_s)
+    summary("warm", warm_s)
+    print(f"speedup (p50): {sorted(cold_s)[len(cold_s) // 2] / sorted(warm_s)[len(warm_s) // 2]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
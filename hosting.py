@@ -1,7 +1,9 @@
 import os
 import sys
+import shutil
 import subprocess
-import json
+import time
+import secrets
 import traceback
 import asyncio
 from datetime import datetime, timedelta
@@ -21,10 +23,61 @@ from telegram.ext import (
     ConversationHandler,
 )
 
+from manager.store import StateStore
+from manager.installer import InstallPool, InstallStep, run_logged
+from manager.envcache import EnvCache
+from manager import logview
+from manager.logship import LogShipper
+from manager import logrotate
+from manager.supervisor import Supervisor, STOPPED, FINISHED
+from manager.limits import Limiter
+from manager.procstats import ProcSampler
+from manager import procstats
+from manager.registry import BotRegistry
+from manager.ingest import BlobStore, UploadTooLarge
+from manager.outbox import Outbox, REPLY, LOGS, AUDIT
+from manager.keys import KeyIndex
+from manager import metrics as prom
+from manager.profiler import SamplingProfiler
+from manager.webhook import PerUserProcessor, run_webhook
+from manager.scheduler import Scheduler, parse_duration, format_duration
+from manager.zygote import WarmPool
+
 # ================= CONFIG =================
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 OWNER_ID = int(os.getenv("OWNER_ID", "0"))
 LOG_GC_ID = int(os.getenv("LOG_GC_ID"))
+INSTALL_WORKERS = int(os.getenv("INSTALL_WORKERS", "2"))
+ENV_CACHE_MB = int(os.getenv("ENV_CACHE_MB", "2048"))
+LOG_SHIP_INTERVAL = int(os.getenv("LOG_SHIP_INTERVAL", "1800"))
+STOP_TIMEOUT = int(os.getenv("STOP_TIMEOUT", "10"))
+KEY_SWEEP_INTERVAL = int(os.getenv("KEY_SWEEP_INTERVAL", "60"))
+SAMPLE_INTERVAL = int(os.getenv("SAMPLE_INTERVAL", "5"))
+RESTORE_CONCURRENCY = int(os.getenv("RESTORE_CONCURRENCY", "4"))
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "8"))  # bulk start/stop mein kitne bots ek saath
+SCHED_TIMEOUT = int(os.getenv("SCHED_TIMEOUT", "600"))  # scheduled run ka default timeout (seconds)
+WARM_POOL = int(os.getenv("WARM_POOL", "0"))  # pre-warmed interpreters; 0 = har start cold
+WARM_PRELOAD = os.getenv("WARM_PRELOAD", "telegram,telegram.ext,aiohttp,requests,asyncio,json,sqlite3")
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "5"))
+BOT_CGROUPS = os.getenv("BOT_CGROUPS", "1") == "1"
+METRICS_ADDR = os.getenv("METRICS_ADDR")  # jaise 127.0.0.1:9100; khaali = band
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # public https URL; set ho to polling ki jagah webhook
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0:8443")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")  # khaali = har start pe random
+CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", "64"))  # 0/1 = ek waqt ek update
+LOG_COMPRESS = os.getenv("LOG_COMPRESS")  # zstd | gzip | none (default: zstd agar installed)
+
+# Key tiers: /gkey ... tier=pro. Order = chhote se bade.
+TIERS = {
+    "free": {"log_max_mb": 5, "log_max_age_h": 24, "log_keep": 3, "log_retention_days": 3,
+             "cpu_pct": 50, "mem_mb": 256, "nofile": 256, "nproc": 32},
+    "pro": {"log_max_mb": 20, "log_max_age_h": 24, "log_keep": 10, "log_retention_days": 14,
+            "cpu_pct": 100, "mem_mb": 512, "nofile": 1024, "nproc": 64},
+    "vip": {"log_max_mb": 50, "log_max_age_h": 24, "log_keep": 30, "log_retention_days": 30,
+            "cpu_pct": 200, "mem_mb": 1024, "nofile": 4096, "nproc": 128},
+}
+DEFAULT_TIER = "free"
 
 if not BOT_TOKEN or not LOG_GC_ID:
     print("❌ BOT_TOKEN aur LOG_GC_ID environment variables mein daal!")
@@ -34,176 +87,645 @@ if not BOT_TOKEN or not LOG_GC_ID:
 UPLOAD_DIR = "uploads"
 LOG_DIR = "logs"
 DATA_DIR = "data"
-for d in [UPLOAD_DIR, LOG_DIR, DATA_DIR]:
+ENV_DIR = "envs"
+for d in [UPLOAD_DIR, LOG_DIR, DATA_DIR, ENV_DIR]:
     os.makedirs(d, exist_ok=True)
 
-KEY_DB = f"{DATA_DIR}/keys.json"
-USER_FILES_DB = f"{DATA_DIR}/user_files.json"
-CHAT_LOGS_DB = f"{DATA_DIR}/chat_logs.json"
-AUTH_USERS_DB = f"{DATA_DIR}/authorized_users.json"
-
 # ================= RUNTIME DATA =================
 running = {}
-keys = {}
-user_files = {}
-chat_logs = {}
+key_index = KeyIndex(TIERS, DEFAULT_TIER)
+registry = BotRegistry()
 authorized_users = set()
+bot_settings = {}
+desired = {}  # jo bots chalne chahiye (manager restart ke baad restore)
+crashed = {}
+tg_bot = None
+install_pool = InstallPool(INSTALL_WORKERS)
+env_cache = EnvCache(ENV_DIR, ENV_CACHE_MB)
+log_shipper = LogShipper(flush_interval=LOG_SHIP_INTERVAL)
+limiter = Limiter(BOT_CGROUPS)
+proc_sampler = ProcSampler()
+blobs = BlobStore(os.path.join(UPLOAD_DIR, ".blobs"), int(MAX_UPLOAD_MB * 1024 * 1024))
+outbox = Outbox()
+scheduler = Scheduler()  # execute/on_run SCHEDULED RUNS section mein
+warm_pool = WarmPool(WARM_POOL, WARM_PRELOAD.split(",")) if WARM_POOL > 0 else None
+
+def log_policy(path):
+    # logs/<owner>/<file>.log (+ _pip_install/_pkg_install) -> owner ka tier
+    return tier_policy(os.path.basename(os.path.dirname(path)))
+
+log_rotator = logrotate.LogRotator(LOG_DIR, log_policy, LOG_COMPRESS, before_truncate=log_shipper.flush_path,
+                                   on_truncate=log_shipper.on_truncate)
+profiler = SamplingProfiler()
+
+# ================= METRICS =================
+metrics = prom.Registry()
+handler_seconds = metrics.histogram("manager_handler_seconds", "Update handler latency", ("handler",))
+install_seconds = metrics.histogram("manager_install_seconds", "Install job duration (pkg + pip)", ("result",))
+store_seconds = metrics.histogram("manager_store_seconds", "State store journal append / compaction time", ("op",),
+                                  buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30))
+loop_lag = metrics.histogram("manager_loop_lag_seconds", "Event loop scheduling lag",
+                             buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 5))
+loop_lag_last = metrics.gauge("manager_loop_lag_last_seconds", "Latest event loop lag sample")
+bot_restarts = metrics.counter("manager_bot_restarts_total", "Bot restarts (auto = supervisor)", ("bot", "kind"))
+sched_seconds = metrics.histogram("manager_scheduled_run_seconds", "Scheduled run duration", ("result",))
+
+def bot_label(bid):
+    bot = registry.get(bid)
+    return f"{bot.owner}/{bot.name}" if bot else bid
+
+metrics.gauge("manager_queue_depth", "Pending items per queue", ("queue",), collect=lambda: {
+    ("install",): install_pool.depth,
+    **{(f"outbox_{k}",): v for k, v in outbox.depth().items()},
+})
+metrics.gauge("manager_log_ship_pending_bytes", "Log output not yet shipped",
+              collect=lambda: {(): log_shipper.pending()})
+metrics.gauge("manager_outbox_messages", "Outbox sends by result", ("result",),
+              collect=lambda: {("sent",): outbox.sent, ("failed",): outbox.failed, ("retried",): outbox.retried})
+metrics.gauge("manager_bots_running", "Running bots", collect=lambda: {(): len(running)})
+metrics.gauge("manager_warm_pool", "Warm interpreter pool: spares and start hits/misses", ("kind",),
+              collect=lambda: {(k,): v for k, v in warm_pool.stats().items()} if warm_pool else {})
+metrics.gauge("manager_bot_cpu_percent", "Bot CPU usage", ("bot",),
+              collect=lambda: {(bot_label(b),): m.cpu for b, m in proc_sampler.samples.items()})
+metrics.gauge("manager_bot_rss_bytes", "Bot resident memory", ("bot",),
+              collect=lambda: {(bot_label(b),): m.rss for b, m in proc_sampler.samples.items()})
+
+def timed(label, fn):
+    # label: fixed naam ya update -> naam (callback type)
+    async def wrapper(update, context):
+        with handler_seconds.time(handler=label(update) if callable(label) else label):
+            return await fn(update, context)
+    return wrapper
+
+def callback_kind(update):
+    return update.callback_query.data.split("|", 1)[0]
 
 # ================= LOAD/SAVE =================
+store = StateStore(DATA_DIR, {
+    "keys": ("keys.json", dict),
+    "bots": ("bots.json", dict),
+    "user_files": ("user_files.json", dict),  # legacy, sirf migration ke liye
+    "chat_logs": ("chat_logs.json", dict),  # legacy
+    "authorized_users": ("authorized_users.json", set),
+    "bot_settings": ("bot_settings.json", dict),
+    "desired": ("running.json", dict),
+    "schedules": ("schedules.json", dict),
+}, fsync=os.getenv("STATE_FSYNC", "0") == "1")
+store.observe = lambda op, seconds: store_seconds.observe(seconds, op=op)
+
 def load_data():
-    global keys, user_files, chat_logs, authorized_users
-    if os.path.exists(KEY_DB):
-        with open(KEY_DB, "r") as f:
-            raw = json.load(f)
-            for k, v in raw.items():
-                v["expiry"] = datetime.fromisoformat(v["expiry"])
-            keys = raw
-    if os.path.exists(USER_FILES_DB):
-        with open(USER_FILES_DB, "r") as f:
-            user_files = json.load(f)
-    if os.path.exists(CHAT_LOGS_DB):
-        with open(CHAT_LOGS_DB, "r") as f:
-            chat_logs = json.load(f)
-    if os.path.exists(AUTH_USERS_DB):
-        with open(AUTH_USERS_DB, "r") as f:
-            authorized_users = set(json.load(f))
-
-def save_all():
-    raw_keys = {k: {**v, "expiry": v["expiry"].isoformat()} for k, v in keys.items()}
-    with open(KEY_DB, "w") as f: json.dump(raw_keys, f, indent=2)
-    with open(USER_FILES_DB, "w") as f: json.dump(user_files, f, indent=2)
-    with open(CHAT_LOGS_DB, "w") as f: json.dump(chat_logs, f, indent=2)
-    with open(AUTH_USERS_DB, "w") as f: json.dump(list(authorized_users), f, indent=2)
+    global authorized_users, bot_settings, desired
+    raw = store.load()
+    for key in key_index.load(raw["keys"]):
+        save_key(key)  # purana format -> compact
+    registry.load(raw["bots"])
+    authorized_users = raw["authorized_users"]
+    bot_settings = raw["bot_settings"]
+    desired = raw["desired"]
+    scheduler.load(raw["schedules"])
+    if raw["user_files"]:
+        migrate_flat_uploads(raw["user_files"], raw["chat_logs"])
+
+def upload_dir(owner):
+    return os.path.join(UPLOAD_DIR, str(owner))
+
+def upload_path(bot):
+    return os.path.join(UPLOAD_DIR, bot.owner, bot.name)
+
+def log_path(bot, suffix=""):
+    return f"{LOG_DIR}/{bot.owner}/{bot.name}{suffix}.log"
+
+def migrate_flat_uploads(user_files, chat_logs):
+    # Purana layout: uploads/<name>, logs/<name>.log, state file name se keyed.
+    # Har (owner, name) ko bot id milta hai aur files uploads/<owner>/ mein jaati hain.
+    chats_of, owners_of = {}, {}
+    for chat, names in chat_logs.items():
+        for name in names:
+            chats_of.setdefault(name, []).append(str(chat))
+    for uid, names in user_files.items():
+        for name in names:
+            owners_of.setdefault(name, set()).add(str(uid))
+    by_name = {}
+    for uid, names in user_files.items():
+        os.makedirs(upload_dir(uid), exist_ok=True)
+        for req in ("requirements.txt", "system_requirements.txt"):
+            if os.path.exists(os.path.join(UPLOAD_DIR, req)):
+                shutil.copy2(os.path.join(UPLOAD_DIR, req), os.path.join(upload_dir(uid), req))
+        for name in dict.fromkeys(names):
+            # Default apna private chat (== uid). Doosra chat (group) sirf tab jab naam
+            # akele is user ka ho aur woh kisi aur user ka private chat na ho
+            chat = str(uid)
+            if chat not in chats_of.get(name, ()) and owners_of[name] == {str(uid)}:
+                chat = next((c for c in chats_of.get(name, ()) if c not in user_files), chat)
+            bot, _ = registry.register(uid, name, chat)
+            store.put("bots", bot.id, bot.record())
+            by_name.setdefault(name, []).append(bot)
+            if os.path.exists(os.path.join(UPLOAD_DIR, name)):
+                shutil.copy2(os.path.join(UPLOAD_DIR, name), upload_path(bot))
+        store.delete("user_files", uid)
+    for chat in chat_logs:
+        store.delete("chat_logs", chat)
+    for name, bots in by_name.items():
+        old_log = f"{LOG_DIR}/{name}.log"
+        for bot in bots:
+            os.makedirs(os.path.dirname(log_path(bot)), exist_ok=True)
+            for seg in [old_log] + logrotate.archives(old_log):
+                if os.path.exists(seg):
+                    shutil.copy2(seg, log_path(bot) + seg[len(old_log):])
+            if name in bot_settings:
+                bot_settings[bot.id] = dict(bot_settings[name])
+                store.put("bot_settings", bot.id, bot_settings[bot.id])
+        info = desired.pop(name, None)
+        owner = next((b for b in bots if info and b.owner == str(info["owner"])), None)
+        if owner:
+            desired[owner.id] = info
+            store.put("desired", owner.id, info)
+        if bot_settings.pop(name, None) is not None:
+            store.delete("bot_settings", name)
+        store.delete("desired", name)
+        for seg in [old_log] + logrotate.archives(old_log) + [os.path.join(UPLOAD_DIR, name)]:
+            if os.path.exists(seg):
+                os.remove(seg)
+    for req in ("requirements.txt", "system_requirements.txt"):
+        if os.path.exists(os.path.join(UPLOAD_DIR, req)):
+            os.remove(os.path.join(UPLOAD_DIR, req))
+
+def tier_policy(user_id):
+    # user ki sabse badi non-expired key ka tier
+    return TIERS[key_index.tier_of(str(user_id))]
+
+def save_key(key):
+    store.put("keys", key, key_index.keys[key].encode())
 
 load_data()
 
 # ================= HELPERS =================
 def is_owner(uid): return OWNER_ID and uid == OWNER_ID
 
+def html_escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+def html_tail(raw, limit):
+    safe = html_escape(raw)
+    if len(safe) <= limit:
+        return safe
+    safe = safe[-limit:]
+    # cut ke baad shuru mein adhoori line / aadhi "&amp;" entity na rahe
+    nl = safe.find("\n")
+    if 0 <= nl < len(safe) - 1:
+        return safe[nl + 1:]
+    semi, amp = safe.find(";"), safe.find("&")
+    if 0 <= semi < 5 and (amp == -1 or amp > semi):
+        safe = safe[semi + 1:]
+    return safe
+
 def is_valid_key(user_id, key):
-    if key not in keys: return False
-    data = keys[key]
-    if datetime.utcnow() > data["expiry"]: return False
-    if len(data.get("used_by", [])) >= data["max_bots"]: return False
-    if str(user_id) not in data.get("used_by", []):
-        data.setdefault("used_by", []).append(str(user_id))
-        save_all()
+    added = key_index.redeem(key, str(user_id))
+    if added is None: return False
+    if added:
+        save_key(key)
     return True
 
 def add_file_tracking(user_id, user_chat_id, filename):
-    str_uid = str(user_id)
-    str_chat = str(user_chat_id)
-    user_files.setdefault(str_uid, []).append(filename)
-    chat_logs.setdefault(str_chat, []).append(filename)
-    save_all()
-
-def remove_file_tracking(user_id, user_chat_id, filename):
-    str_uid = str(user_id)
-    str_chat = str(user_chat_id)
-    if str_uid in user_files and filename in user_files[str_uid]:
-        user_files[str_uid].remove(filename)
-        if not user_files[str_uid]: del user_files[str_uid]
-    if str_chat in chat_logs and filename in chat_logs[str_chat]:
-        chat_logs[str_chat].remove(filename)
-        if not chat_logs[str_chat]: del chat_logs[str_chat]
-    save_all()
-
-# ================= PERIODIC LOGS (SAFE HTML) =================
-async def periodic_logs(filename, user_chat_id, context):
-    log_path = f"{LOG_DIR}/{filename}.log"
-    last_size = 0
-    while filename in running:
-        await asyncio.sleep(1800)  # 30 minutes
-        if not os.path.exists(log_path):
-            continue
-        size = os.path.getsize(log_path)
-        if size <= last_size:
-            continue
-        with open(log_path, "r", errors="ignore") as f:
-            f.seek(last_size)
-            raw_new_log = f.read()
-            last_size = size
-        if raw_new_log.strip():
-            safe_log = raw_new_log.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-            await context.bot.send_message(
-                user_chat_id,
-                f"📜 <b>30-Min Auto Logs — {filename}</b>\n<pre>{safe_log[-3500:]}</pre>",
-                parse_mode="HTML"
-            )
+    bot, changed = registry.register(user_id, filename, user_chat_id)
+    if changed:
+        store.put("bots", bot.id, bot.record())
+    return bot
+
+def remove_file_tracking(bid):
+    if registry.remove(bid):
+        store.delete("bots", bid)
 
 # ================= START PROCESS (WITH AUTO PKG + PIP) =================
-async def start_process(filename, context, user_chat_id, user_id=None):
-    path = os.path.join(UPLOAD_DIR, filename)
-    
-    if filename in running:
-        running[filename]["proc"].terminate()
-        running[filename]["log_file"].close()
-        running[filename]["periodic_task"].cancel()
+def release_process(bid, pid=None):
+    r = running.get(bid)
+    if not r or (pid is not None and r["pid"] != pid):
+        return None
+    del running[bid]
+    if r["log_file"]:
+        r["log_file"].close()
+    log_shipper.untrack(bid)
+    limiter.release(bid)
+    return r
+
+def forget_desired(bid):
+    if desired.pop(bid, None) is not None:
+        store.delete("desired", bid)
 
+async def stop_process(bid):
+    # SIGTERM process group -> STOP_TIMEOUT -> SIGKILL; pending auto-restart bhi cancel
+    supervisor.cancel_restart(bid)
+    crashed.pop(bid, None)
+    if bid in running:
+        await supervisor.stop(bid)
+        release_process(bid)
+
+async def on_bot_exit(bid, pid, rc, state, delay):
+    r = release_process(bid, pid)
+    if state == STOPPED or r is None:
+        return
+    if state == FINISHED:
+        # script ne apna kaam khatam kiya (exit 0): STOPPED, na restart na crash
+        forget_desired(bid)
+        text = f"✅ <b>{r['name']}</b> khatam ho gaya (exit <code>0</code>)"
+        outbox.send(r["user_chat_id"], text, priority=REPLY)
+        outbox.audit(LOG_GC_ID, text)
+        return
+    if delay is None or delay == -1:
+        forget_desired(bid)  # auto-restart nahi hoga -> manager restart pe bhi nahi
+    crashed[bid] = {"rc": rc, "at": time.time(), "delay": delay,
+                    "owner": r["owner"], "user_chat_id": r["user_chat_id"], "env": r["env"]}
+    text = f"💥 <b>{r['name']}</b> crash ho gaya (exit <code>{rc}</code>)"
+    if delay == -1:
+        text += "\n🛑 Crash loop! Auto-restart band, logs dekh ke manually START karo."
+    elif delay:
+        text += f"\n♻️ Auto-restart {delay}s mein..."
+    outbox.send(r["user_chat_id"], text, priority=REPLY)
+    outbox.audit(LOG_GC_ID, text)
+
+async def respawn(bid):
+    info = crashed.pop(bid, None)
+    if not info or bid in running:
+        return
+    bot_restarts.inc(bot=bot_label(bid), kind="auto")
+    await launch_process(bid, info["user_chat_id"], info["owner"], info["env"])
+
+supervisor = Supervisor(on_bot_exit, respawn, stop_timeout=STOP_TIMEOUT)
+
+def install_steps(bot):
+    steps, env_key = [], None
+    os.makedirs(os.path.dirname(log_path(bot)), exist_ok=True)  # install logs bhi logs/<owner>/ mein
     # ===== AUTO SYSTEM PACKAGES (pkg install) =====
-    sys_req_path = os.path.join(UPLOAD_DIR, "system_requirements.txt")
+    sys_req_path = os.path.join(upload_dir(bot.owner), "system_requirements.txt")
     if os.path.exists(sys_req_path):
-        await context.bot.send_message(
-            user_chat_id,
-            "🔧 <b>System packages (pkg install) shuru kar raha hoon...</b>\nLive progress logs mein dikhega! ⏳",
-            parse_mode="HTML"
-        )
         with open(sys_req_path, "r") as f:
             packages = [line.strip() for line in f if line.strip()]
-
-        if packages:
-            log_file_sys = open(f"{LOG_DIR}/{filename}_pkg_install.log", "a", buffering=1)
-            proc_pkg = subprocess.Popen(
-                ["pkg", "install", "-y"] + packages,
-                stdout=log_file_sys,
-                stderr=log_file_sys,
-                text=True
-            )
-            proc_pkg.wait()
-            log_file_sys.close()
-
-            if proc_pkg.returncode == 0:
-                await context.bot.send_message(user_chat_id, "✅ <b>System packages successfully install ho gaye!</b>", parse_mode="HTML")
-            else:
-                await context.bot.send_message(user_chat_id, "⚠️ <b>System packages mein error aaya, logs check karo.</b>", parse_mode="HTML")
-
-    # ===== AUTO PIP REQUIREMENTS =====
-    req_path = os.path.join(UPLOAD_DIR, "requirements.txt")
+        pkg_key = env_cache.pkg_key(packages) if packages else None
+        if packages and not env_cache.pkg_done(pkg_key):
+            async def run_pkg(job, step):
+                rc = await run_logged(["pkg", "install", "-y"] + packages, step.log_path, job.output)
+                if rc == 0:
+                    env_cache.mark_pkg(pkg_key)
+                return rc
+            steps.append(InstallStep("🔧 pkg install", log_path=log_path(bot, "_pkg_install"), run=run_pkg))
+    # ===== AUTO PIP REQUIREMENTS (cached venv per requirements hash) =====
+    req_path = os.path.join(upload_dir(bot.owner), "requirements.txt")
     if os.path.exists(req_path):
-        await context.bot.send_message(user_chat_id, "📦 <b>pip packages install kar raha hoon...</b>", parse_mode="HTML")
-        log_file_pip = open(f"{LOG_DIR}/{filename}_pip_install.log", "a", buffering=1)
-        proc_pip = subprocess.Popen(
-            [sys.executable, "-m", "pip", "install", "-r", req_path],
-            stdout=log_file_pip,
-            stderr=log_file_pip,
-            text=True
-        )
-        proc_pip.wait()
-        log_file_pip.close()
-        if proc_pip.returncode == 0:
-            await context.bot.send_message(user_chat_id, "✅ <b>pip packages install complete!</b>", parse_mode="HTML")
-        else:
-            await context.bot.send_message(user_chat_id, "⚠️ <b>pip install mein error, logs dekh lo.</b>", parse_mode="HTML")
+        env_key = env_cache.key_for(req_path)
+        if not env_cache.is_ready(env_key):
+            async def run_pip(job, step):
+                return await env_cache.ensure(env_key, req_path, step.log_path, job.output)
+            steps.append(InstallStep(f"📦 pip env <code>{env_key[:8]}</code>",
+                                     log_path=log_path(bot, "_pip_install"), run=run_pip))
+    return steps, env_key
 
-    # ===== RUN THE BOT =====
-    log_file = open(f"{LOG_DIR}/{filename}.log", "a", buffering=1)
+def job_text(job):
+    icon = {"queued": "⏳", "running": "⚙️", "done": "✅", "failed": "⚠️", "cancelled": "🚫"}[job.state]
+    lines = [f"{icon} <b>Job #{job.id}</b> — <code>{job.meta['name']}</code> ({job.state.upper()})"]
+    for step in job.steps:
+        mark = "⏳" if step.returncode is None else ("✅" if step.returncode == 0 else f"❌ exit {step.returncode}")
+        lines.append(f"{step.label}: {mark}")
+    if job.state == "queued":
+        lines.append(f"📋 Queue position: {install_pool.position(job)}")
+    elif job.state == "running" and job.tail:
+        lines.append(f"<pre>{html_tail(chr(10).join(job.tail), 1500)}</pre>")
+    if job.started:
+        lines.append(f"⏱️ {job.duration:.1f}s")
+    if job.state in ("done", "failed"):
+        lines.append("🟢 Bot launched! Logs live aa rahe hain.")
+    return "\n".join(lines)
+
+async def job_notify(job, event, text):
+    bot = job.meta["bot"]
+    chat_id = job.meta["user_chat_id"]
+    if event == "start":
+        if not job.steps:
+            return
+        msg = await outbox.request(chat_id, bot.send_message, chat_id, job_text(job), parse_mode="HTML")
+        job.meta["msg_id"] = msg.message_id
+    elif "msg_id" in job.meta:
+        # pending progress edit abhi gaya nahi to usi ka text replace (coalesce)
+        outbox.fire(chat_id, bot.edit_message_text, job_text(job), chat_id=chat_id,
+                    message_id=job.meta["msg_id"], parse_mode="HTML", key=("job", job.id))
 
-    proc = subprocess.Popen(
-        [sys.executable, "-u", path],
+def spawn_script(bot, env_key, key, log_file):
+    # key = limiter/cgroup naam (bot id ya sched-N). Warm spare mile to usko handoff
+    # (log + limits child khud lagata hai), warna cold `python -u path`.
+    caps = tier_policy(bot.owner)
+    cgroup = limiter.prepare(key, caps)
+    python = env_cache.python(env_key)
+    proc = warm_pool.take(python) if warm_pool else None
+    if proc:
+        try:
+            WarmPool.handoff(proc, upload_path(bot), log_path(bot), limiter.spec(caps, cgroup))
+            return proc
+        except OSError:
+            pass
+    return subprocess.Popen(
+        [python, "-u", upload_path(bot)],
         stdout=log_file,
         stderr=log_file,
-        start_new_session=True
+        start_new_session=True,
+        preexec_fn=limiter.preexec(caps, cgroup)
     )
 
-    periodic_task = asyncio.create_task(periodic_logs(filename, user_chat_id, context))
+async def launch_process(bid, user_chat_id, user_id=None, env_key=None):
+    # bid = bot id; owner hamesha registry se (user_id admin bhi ho sakta hai)
+    bot = registry.get(bid)
+    if not bot:
+        return
+    owner = bot.owner
+    if bid in running:
+        bot_restarts.inc(bot=bot_label(bid), kind="manual")
+    await stop_process(bid)
+
+    # ===== RUN THE BOT =====
+    # pip fail hua to env ready nahi hoga -> purane jaisa base interpreter
+    if env_key and not env_cache.is_ready(env_key):
+        env_key = None
+    if env_key:
+        env_cache.touch(env_key)
+    bot_log = log_path(bot)
+    os.makedirs(os.path.dirname(bot_log), exist_ok=True)
+    log_file = open(bot_log, "a", buffering=1)
+    proc = spawn_script(bot, env_key, bid, log_file)
+    started = time.time()  # warm spare ka /proc start time handoff se pehle ka hai, uptime yahan se
+
+    log_shipper.track(bid, bot_log, user_chat_id, bot.name)
+    supervisor.watch(bid, proc, autorestart=bot_settings.get(bid, {}).get("autorestart", False))
 
-    running[filename] = {
+    running[bid] = {
         "proc": proc,
+        "pid": proc.pid,
         "log_file": log_file,
-        "owner": user_id or running.get(filename, {}).get("owner"),
+        "name": bot.name,
+        "owner": owner,
         "user_chat_id": user_chat_id,
-        "periodic_task": periodic_task
+        "env": env_key,
+        "started": started,
     }
+    # pid + /proc start time: restart ke baad same process hai ya pid reuse, pata chal sake
+    desired[bid] = {"owner": owner, "user_chat_id": user_chat_id, "env": env_key, "pid": proc.pid,
+                    "start": procstats.start_time(proc.pid), "boot": procstats.BOOT_TIME, "started": started}
+    store.put("desired", bid, desired[bid])
+
+def adopt_process(bid, info):
+    # Pichle manager ka chhoda hua process group abhi bhi zinda hai -> dobara supervise karo
+    pid = info.get("pid")
+    bot = registry.get(bid)
+    if not pid or info.get("boot") != procstats.BOOT_TIME or procstats.start_time(pid) != info.get("start"):
+        return False
+    log_shipper.track(bid, log_path(bot), info["user_chat_id"], bot.name)
+    supervisor.watch(bid, pid=pid, autorestart=bot_settings.get(bid, {}).get("autorestart", False))
+    running[bid] = {
+        "proc": None,
+        "pid": pid,
+        "log_file": None,  # bot ka apna O_APPEND fd hai
+        "name": bot.name,
+        "owner": bot.owner,
+        "user_chat_id": info["user_chat_id"],
+        "env": info.get("env"),
+        "started": info.get("started"),  # purane records mein nahi -> /proc start time
+    }
+    if info.get("env"):
+        env_cache.touch(info["env"])
+    return True
+
+async def restore_fleet():
+    t0 = time.time()
+    booted = procstats.started_at(os.getpid()) or t0
+    adopted, restarted, failed = [], [], []
+    sem = asyncio.Semaphore(RESTORE_CONCURRENCY)
+
+    async def restart(bid, info):
+        async with sem:
+            try:
+                job = await start_process(bid, tg_bot, info["user_chat_id"], info["owner"])
+                await job.done.wait()
+            except Exception as e:
+                print(f"Restore {bid} failed: {e}")
+        (restarted if bid in running else failed).append(registry.get(bid).name)
+
+    pending = []
+    for bid, info in list(desired.items()):
+        bot = registry.get(bid)
+        if not bot or not os.path.exists(upload_path(bot)):
+            forget_desired(bid)
+        elif adopt_process(bid, info):
+            adopted.append(bot.name)
+        else:
+            pending.append(restart(bid, info))
+    await asyncio.gather(*pending)
+    if not (adopted or restarted or failed):
+        return
+    done = time.time()
+    text = (
+        "♻️ <b>Fleet restored</b>\n\n"
+        f"🔗 Adopted: {len(adopted)}\n"
+        f"🚀 Restarted: {len(restarted)}\n"
+        f"❌ Failed: {len(failed)}\n"
+        f"⏱️ Ready in {done - t0:.1f}s (manager start se {done - booted:.1f}s)"
+    )
+    if failed:
+        text += "\n<code>" + html_escape(", ".join(sorted(failed))[:500]) + "</code>"
+    print(text.replace("<b>", "").replace("</b>", "").replace("<code>", "").replace("</code>", ""))
+    outbox.send(LOG_GC_ID, text, priority=AUDIT)
+
+async def start_process(bid, tg, user_chat_id, user_id=None):
+    # Install + launch background job pool mein jaata hai; caller ko turant job handle milta hai
+    steps, env_key = install_steps(registry.get(bid))
+
+    async def on_done(job):
+        if job.steps:
+            install_seconds.observe(job.duration, result=job.state)
+        supervisor.reset_crashes(bid)
+        await launch_process(bid, user_chat_id, user_id, env_key)
+        if job.steps:
+            pinned = {r["env"] for r in running.values() if r.get("env")}
+            pinned |= {d["env"] for d in desired.values() if d.get("env")}
+            asyncio.create_task(asyncio.to_thread(env_cache.evict, pinned))
+
+    return install_pool.submit(
+        bid,
+        steps,
+        notify=job_notify,
+        on_done=on_done,
+        meta={"bot": tg, "user_chat_id": user_chat_id, "name": registry.get(bid).name},
+    )
+
+# ================= BULK FLEET OPS =================
+BULK_ICONS = {"start": "▶️", "restart": "🔄", "stop": "🛑"}
+
+async def resolve_deps(bots):
+    # Ek owner ke saare bots same requirements.txt / system_requirements.txt use
+    # karte hain -> owner pe ek install job, har bot pe nahi. owner -> env_key
+    envs = {}
+
+    async def resolve(owner, bot):
+        steps, envs[owner] = install_steps(bot)
+        if steps:
+            job = install_pool.submit(f"deps:{owner}", steps, meta={"name": f"deps {owner}"})
+            await job.done.wait()
+            install_seconds.observe(job.duration, result=job.state)
+
+    first = {}
+    for b in bots:
+        first.setdefault(b.owner, b)
+    await asyncio.gather(*(resolve(owner, b) for owner, b in first.items()))
+    return envs
+
+async def bulk_action(action, bots, user_id):
+    """start/restart/stop, BULK_CONCURRENCY bots parallel. (ok, skipped, failed) names."""
+    ok, skipped, failed = [], [], []
+    envs = await resolve_deps(bots) if action != "stop" else {}
+    sem = asyncio.Semaphore(BULK_CONCURRENCY)
+
+    async def one(bot):
+        async with sem:
+            if action == "start" and bot.id in running:
+                skipped.append(bot.name)
+                return
+            install_pool.cancel(bot.id)
+            try:
+                if action == "stop":
+                    forget_desired(bot.id)
+                    await stop_process(bot.id)
+                else:
+                    # logs wahin jaate rahein jahan pehle ja rahe the (owner ke chat mein nahi)
+                    r = running.get(bot.id) or desired.get(bot.id) or {}
+                    supervisor.reset_crashes(bot.id)
+                    await launch_process(bot.id, r.get("user_chat_id") or int(bot.chat), user_id, envs.get(bot.owner))
+            except Exception as e:
+                print(f"Bulk {action} {bot.id} failed: {e}")
+            live = bot.id in running
+            (ok if live != (action == "stop") else failed).append(bot.name)
+
+    await asyncio.gather(*(one(b) for b in bots))
+    return ok, skipped, failed
+
+async def run_bulk(action, selector, bots, user_id, chat_id, message_id=None):
+    # Poora kaam background mein; result ek hi summary message (ya progress message ka edit)
+    t0 = time.time()
+    try:
+        ok, skipped, failed = await bulk_action(action, bots, user_id)
+    except Exception as e:
+        print(f"Bulk {action} crashed: {traceback.format_exc()}")
+        ok, skipped, failed = [], [], [f"error: {e}"]
+    lines = [
+        f"{BULK_ICONS[action]} <b>Bulk {action.upper()}</b> <code>{html_escape(selector)}</code> — {len(bots)} bots\n",
+        f"✅ OK: {len(ok)}",
+    ]
+    if skipped:
+        lines.append(f"⏭️ Already live: {len(skipped)}")
+    lines.append(f"❌ Failed: {len(failed)}")
+    if failed:
+        lines.append("<code>" + html_escape(", ".join(sorted(failed))[:800]) + "</code>")
+    lines.append(f"⏱️ {time.time() - t0:.1f}s")
+    text = "\n".join(lines)
+    kb = InlineKeyboardMarkup([[InlineKeyboardButton("📂 All Files", callback_data="files")]])
+    if message_id:
+        outbox.fire(chat_id, tg_bot.edit_message_text, text, chat_id=chat_id, message_id=message_id,
+                    reply_markup=kb, parse_mode="HTML")
+    else:
+        outbox.send(chat_id, text, reply_markup=kb)
+    outbox.audit(LOG_GC_ID, f"{BULK_ICONS[action]} Bulk {action.upper()} <code>{html_escape(selector)}</code>: "
+                            f"{len(ok)} ok, {len(failed)} failed by <code>{user_id}</code>")
+
+# ================= SCHEDULED RUNS =================
+def sched_key(job):
+    return f"sched-{job.id}"  # supervisor/limiter key; bot ids se takraata nahi
+
+async def run_scheduled(job):
+    # Ek run: deps -> process (bot ke log mein append) -> exit ka wait. None = skip
+    # (file gayi / bot already live / owner ki key lapse). Timeout pe scheduler
+    # isko cancel karta hai aur finally process group band karta hai.
+    bot = registry.get(job.bot)
+    if not bot or not os.path.exists(upload_path(bot)) or bot.id in running:
+        return None
+    if bot.owner not in authorized_users and not is_owner(int(bot.owner)):
+        return None
+    env_key = (await resolve_deps([bot])).get(bot.owner)
+    if env_key and not env_cache.is_ready(env_key):
+        env_key = None
+    if env_key:
+        env_cache.touch(env_key)
+    key = sched_key(job)
+    with open(log_path(bot), "a", buffering=1) as log_file:
+        log_file.write(f"\n===== ⏰ scheduled run #{job.id} ({job.spec}) {datetime.now():%Y-%m-%d %H:%M:%S} =====\n")
+        proc = spawn_script(bot, env_key, key, log_file)
+    w = supervisor.watch(key, proc)
+    try:
+        await w.exited.wait()
+        return w.returncode
+    finally:
+        if not w.exited.is_set():
+            await supervisor.stop(key)
+        supervisor.reset_crashes(key)
+        limiter.release(key)
+
+def on_scheduled_run(job, run):
+    store.put("schedules", job.id, job.record())
+    sched_seconds.observe(run.duration, result=run.result.split(":")[0].split(" ")[0])
+    bot = registry.get(job.bot)
+    if bot and run.result not in ("ok", "skipped"):
+        outbox.send(int(bot.chat), f"⏰ <b>{bot.name}</b> scheduled run #{job.id}: "
+                                   f"<code>{html_escape(run.result)}</code> ({run.duration:.1f}s)", priority=LOGS)
+
+scheduler.execute = run_scheduled
+scheduler.on_run = on_scheduled_run
+
+def unschedule_bot(bid):
+    for job in scheduler.of_bot(bid):
+        scheduler.remove(job.id)
+        store.delete("schedules", job.id)
+
+def schedule_line(job):
+    nxt = datetime.fromtimestamp(job.next_run).strftime("%d %b %H:%M") if job.next_run else "—"
+    line = f"⏰ #{job.id} <code>{html_escape(job.spec)}</code> (timeout {format_duration(job.timeout)}) → next {nxt}"
+    if job.running:
+        line += " | ⚙️ running"
+    elif job.history:
+        last = job.history[-1]
+        ok = sum(r.result == "ok" for r in job.history)
+        line += f" | last {'✅' if last.result == 'ok' else html_escape(last.result)} {last.duration:.1f}s, {ok}/{len(job.history)} ok"
+    return line
+
+# ================= KEY EXPIRY =================
+async def revoke_user(uid):
+    # Key lapse: access hatao, bots band (restore list se bhi)
+    authorized_users.discard(uid)
+    store.discard("authorized_users", uid)
+    stopped = []
+    for bot in registry.of_owner(uid):
+        install_pool.cancel(bot.id)
+        forget_desired(bot.id)
+        unschedule_bot(bot.id)
+        if bot.id in running or supervisor.restart_pending(bot.id):
+            await stop_process(bot.id)
+            stopped.append(bot.name)
+    outbox.send(int(uid), "⌛ <b>Tumhari key expire ho gayi!</b>\n"
+                f"{len(stopped)} bot(s) band kiye gaye. Owner se nayi key lo.", priority=REPLY)
+    outbox.audit(LOG_GC_ID, f"⌛ Key lapsed for <code>{uid}</code>, {len(stopped)} bot(s) stopped")
+
+async def sweep_keys():
+    now = time.time()
+    lapsed = set()
+    for key, rec in key_index.pop_expired(now):
+        store.delete("keys", key)
+        lapsed |= rec.used_by
+    for uid in lapsed:
+        if uid in authorized_users and not key_index.valid_keys(uid, now) and not is_owner(int(uid)):
+            await revoke_user(uid)
+
+async def key_sweeper():
+    while True:
+        try:
+            await sweep_keys()
+        except Exception as e:
+            print(f"Key sweeper error: {e}")
+        nxt = key_index.next_expiry()
+        wait = KEY_SWEEP_INTERVAL if nxt is None else min(KEY_SWEEP_INTERVAL, nxt - time.time())
+        await asyncio.sleep(max(1, wait))
 
 # ================= COMMANDS =================
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -216,8 +738,8 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "🚀 <b><u>PRO PYTHON MANAGER BOT</u></b> 🚀\n\n"
         "✅ Termux Logs Fixed\n"
         "✅ HTML Parse Errors Fixed\n"
-        "⏰ 30-Min Auto Logs\n"
-        "🔄 Manual Control Only\n"
+        f"⏰ {LOG_SHIP_INTERVAL // 60}-Min Auto Logs (kuch drop nahi hota)\n"
+        "🔄 Manual Control + ⏰ Cron Jobs (/schedule)\n"
         "🛡️ Full Secure Backup\n"
         "🔥 <b>NEW: AUTO PKG + PIP INSTALL</b> 🔥\n\n"
         "📦 <code>requirements.txt</code> → Auto pip install\n"
@@ -240,33 +762,179 @@ async def check_key(update: Update, context: ContextTypes.DEFAULT_TYPE):
     key = update.message.text.strip()
     user_id = update.effective_user.id
     if is_valid_key(user_id, key):
-        authorized_users.add(str(user_id))
-        save_all()
+        if str(user_id) not in authorized_users:
+            authorized_users.add(str(user_id))
+            store.add("authorized_users", str(user_id))
         await update.message.reply_text("✅ <b>Key Accepted!</b>\n\nAb .py files upload kar sakte ho! 🚀", parse_mode="HTML")
     else:
         await update.message.reply_text("❌ <b>Invalid/Expired Key!</b>\nOwner se new key lo.", parse_mode="HTML")
     return ConversationHandler.END
 
+MAX_BULK_KEYS = 100
+
 async def gkey(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not is_owner(update.effective_user.id): return
-    if len(context.args) < 3:
-        await update.message.reply_text("Usage: /gkey <days> <max_bots> <name>")
+    opts = dict(a.split("=", 1) for a in context.args if a.startswith(("tier=", "n=")))
+    args = [a for a in context.args if not a.startswith(("tier=", "n="))]
+    tier = opts.get("tier", DEFAULT_TIER)
+    count = int(opts["n"]) if opts.get("n", "").isdigit() else 1
+    if len(args) < 3 or tier not in TIERS or not 1 <= count <= MAX_BULK_KEYS:
+        await update.message.reply_text(
+            f"Usage: /gkey <days> <max_bots> <name> [tier={'|'.join(TIERS)}] [n=1..{MAX_BULK_KEYS}]")
         return
-    days, max_bots = int(context.args[0]), int(context.args[1])
-    name = " ".join(context.args[2:])
-    import random, string
-    key = "".join(random.choices(string.ascii_uppercase + string.digits, k=16))
-    keys[key] = {"expiry": datetime.utcnow() + timedelta(days=days), "max_bots": max_bots, "name": name, "used_by": []}
-    save_all()
+    days, max_bots = int(args[0]), int(args[1])
+    name = " ".join(args[2:])
+    made = key_index.create(days, max_bots, name, tier, count)
+    for key in made:
+        save_key(key)
     await update.message.reply_text(
-        f"🔐 <b>New Key Generated</b>\n\n"
-        f"<code>{key}</code>\n"
-        f"📛 Name: {name}\n"
+        f"🔐 <b>{'New Key Generated' if count == 1 else f'{count} Keys Generated'}</b>\n\n"
+        + "\n".join(f"<code>{key}</code>" for key in made) + "\n"
+        f"📛 Name: {html_escape(name)}\n"
         f"📅 Valid: {days} days\n"
-        f"🤖 Max Bots: {max_bots}",
+        f"🤖 Max Bots: {max_bots}\n"
+        f"⭐ Tier: {tier}",
+        parse_mode="HTML"
+    )
+
+def key_line(key, rec):
+    left = rec.expiry - time.time()
+    expires = f"{left / 86400:.1f}d" if left > 0 else "expired"
+    return (f"<code>{key}</code> — {html_escape(rec.name)} | {rec.tier or DEFAULT_TIER} | "
+            f"👥 {len(rec.used_by)}/{rec.max_bots} | ⏳ {expires}")
+
+async def list_keys(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # /keys [page] -> naye pehle; /keys <KEY | user_id | name words> -> index lookup
+    if not is_owner(update.effective_user.id): return
+    query = " ".join(context.args)
+    try:
+        page = int(query) if query and len(query) < 4 else None  # lambe numbers = user_id search
+    except ValueError:
+        page = None  # "²" jaise isdigit() wale bhi int() pe fail hote hain -> search
+    if not query or page is not None:
+        page = max(1, page or 1)
+        found = key_index.recent((page - 1) * 20, 20)
+        title = f"🔑 <b>Keys</b> (page {page}, total {len(key_index.keys)})"
+    else:
+        found = key_index.search(query)
+        title = f"🔍 <b>Keys matching</b> <code>{html_escape(query)}</code>"
+    if not found:
+        await update.message.reply_text("🔑 Koi key nahi mili.", parse_mode="HTML")
+        return
+    await update.message.reply_text(title + "\n\n" + "\n".join(key_line(k, r) for k, r in found), parse_mode="HTML")
+
+async def outbox_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if not is_owner(update.effective_user.id): return
+    st = outbox.stats()
+    depth = " | ".join(f"{k}: {v}" for k, v in st["depth"].items())
+    await update.message.reply_text(
+        "📮 <b><u>OUTBOX</u></b>\n\n"
+        f"📋 <b>Queue:</b> {depth}\n"
+        f"🚚 <b>In-flight:</b> {st['inflight']}\n"
+        f"✅ <b>Sent:</b> {st['sent']} | ❌ <b>Failed:</b> {st['failed']} | ♻️ <b>Retried:</b> {st['retried']}\n"
+        f"⏱️ <b>Latency:</b> p50 {st['latency_p50'] * 1000:.0f} ms, p99 {st['latency_p99'] * 1000:.0f} ms",
         parse_mode="HTML"
     )
 
+async def profile_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # /profile [seconds]: event loop ka sampling profile, background mein
+    if not is_owner(update.effective_user.id): return
+    seconds = min(int(context.args[0]), 120) if context.args and context.args[0].isdigit() else 10
+    if profiler.running:
+        await update.message.reply_text("⏳ Profiler pehle se chal raha hai.")
+        return
+    chat_id = update.effective_chat.id
+
+    async def run():
+        prof = await profiler.run(seconds)
+        rows = "\n".join(f"{own:5d} {total:5d}  {fn[:70]}" for fn, own, total in prof.top())
+        outbox.send(chat_id, f"🔬 <b>Profile</b> ({prof.samples} samples, {prof.duration:.1f}s)\n"
+                             f"<pre> self total  function\n{html_escape(rows)}</pre>")
+        outbox.fire(chat_id, context.bot.send_document, chat_id, document=prof.collapsed().encode(),
+                    filename=f"profile-{int(time.time())}.collapsed",
+                    caption="Collapsed stacks (flamegraph.pl / speedscope)")
+
+    context.application.create_task(run())
+    await update.message.reply_text(f"🔬 Profiling {seconds}s... result yahin aayega.")
+
+async def fleet(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # /fleet <start|restart|stop> <all|#tag|glob>: owner = poora fleet, baaki = apne bots
+    user_id = update.effective_user.id
+    if len(context.args) != 2 or context.args[0] not in BULK_ICONS:
+        await update.message.reply_text(
+            "Usage: <code>/fleet start|restart|stop all|#tag|glob</code>\n"
+            "Jaise: <code>/fleet restart #prod</code>, <code>/fleet stop weather_*</code>",
+            parse_mode="HTML"
+        )
+        return
+    action, selector = context.args
+    scope = registry.bots.values() if is_owner(user_id) else registry.of_owner(user_id)
+    bots = registry.select(scope, selector)
+    if not bots:
+        await update.message.reply_text(f"❌ <code>{html_escape(selector)}</code> se koi bot match nahi hua.", parse_mode="HTML")
+        return
+    msg = await update.message.reply_text(
+        f"⏳ {BULK_ICONS[action]} <b>Bulk {action.upper()}</b> — {len(bots)} bots "
+        f"({BULK_CONCURRENCY} parallel)...", parse_mode="HTML")
+    context.application.create_task(
+        run_bulk(action, selector, bots, user_id, update.effective_chat.id, msg.message_id))
+
+async def tag_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # /tag <file.py> [tag ...]: tags replace; sirf file = tags clear
+    user_id = update.effective_user.id
+    if not context.args:
+        await update.message.reply_text("Usage: /tag <file.py> [tag1 tag2 ...]")
+        return
+    bot = registry.lookup(user_id, context.args[0])
+    if not bot:
+        await update.message.reply_text("❌ Ye file tumhari nahi hai!")
+        return
+    tags = registry.set_tags(bot.id, context.args[1:])
+    store.put("bots", bot.id, bot.record())
+    shown = " ".join(f"#{t}" for t in sorted(tags)) or "—"
+    await update.message.reply_text(f"🏷️ <code>{bot.name}</code>: {shown}", parse_mode="HTML")
+
+async def schedule_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # /schedule -> list; /schedule <file.py> <every 15m | cron | @daily> [timeout=5m]
+    user_id = update.effective_user.id
+    if not context.args:
+        jobs = [j for b in registry.of_owner(user_id) for j in scheduler.of_bot(b.id)]
+        if not jobs:
+            await update.message.reply_text(
+                "⏰ Koi schedule nahi.\n"
+                "Usage: <code>/schedule scraper.py every 15m</code>\n"
+                "<code>/schedule report.py 0 9 * * 1-5 timeout=10m</code>\n"
+                "<code>/schedule backup.py @daily</code>", parse_mode="HTML")
+            return
+        lines = [f"<code>{registry.get(j.bot).name}</code>\n{schedule_line(j)}" for j in sorted(jobs, key=lambda j: int(j.id))]
+        await update.message.reply_text("⏰ <b>Schedules</b>\n\n" + "\n\n".join(lines), parse_mode="HTML")
+        return
+    opts = [a for a in context.args[1:] if a.startswith("timeout=")]
+    spec = " ".join(a for a in context.args[1:] if not a.startswith("timeout="))
+    bot = registry.lookup(user_id, context.args[0])
+    if not bot:
+        await update.message.reply_text("❌ Ye file tumhari nahi hai!")
+        return
+    try:
+        timeout = parse_duration(opts[0].split("=", 1)[1]) if opts else SCHED_TIMEOUT
+        job = scheduler.create(bot.id, spec, timeout)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {html_escape(str(e))}", parse_mode="HTML")
+        return
+    store.put("schedules", job.id, job.record())
+    await update.message.reply_text(f"✅ <code>{bot.name}</code> scheduled\n{schedule_line(job)}", parse_mode="HTML")
+    outbox.audit(LOG_GC_ID, f"⏰ <b>{bot.name}</b> scheduled <code>{html_escape(job.spec)}</code> by <code>{user_id}</code>")
+
+async def unschedule_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = update.effective_user.id
+    job = scheduler.jobs.get(context.args[0]) if context.args else None
+    if not job or not registry.owned(job.bot, user_id, is_owner(user_id)):
+        await update.message.reply_text("Usage: /unschedule <id>  (ids: /schedule)")
+        return
+    scheduler.remove(job.id)
+    store.delete("schedules", job.id)
+    await update.message.reply_text(f"🗑️ Schedule #{job.id} hata diya.")
+
 # ================= FILE UPLOAD =================
 async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
     doc = update.message.document
@@ -281,14 +949,31 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ Pehle <b>/enterkey</b> se valid key daalo!", parse_mode="HTML")
         return
 
-    filename = doc.file_name
-    path = os.path.join(UPLOAD_DIR, filename)
+    if doc.file_size and doc.file_size > blobs.max_bytes:
+        await update.message.reply_text(f"❌ File bahut badi hai! Max {MAX_UPLOAD_MB:g} MB.", parse_mode="HTML")
+        return
 
-    file_obj = await doc.get_file()
-    await file_obj.download_to_drive(path)
+    # har user ka apna namespace: uploads/<user_id>/<name>
+    filename = os.path.basename(doc.file_name)
+    path = os.path.join(upload_dir(user_id), filename)
 
+    # temp file -> sha256 blob -> atomic rename; adhoori download kabhi bot script nahi banti
+    tmp = blobs.temp_path(path)
     try:
-        await context.bot.send_document(
+        file_obj = await doc.get_file()
+        await file_obj.download_to_drive(tmp)
+        digest, changed = await asyncio.to_thread(blobs.commit, tmp, path)
+    except UploadTooLarge:
+        await update.message.reply_text(f"❌ File bahut badi hai! Max {MAX_UPLOAD_MB:g} MB.", parse_mode="HTML")
+        return
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    if changed:
+        outbox.fire(
+            LOG_GC_ID,
+            context.bot.send_document,
             LOG_GC_ID,
             document=doc.file_id,
             caption=(
@@ -296,30 +981,152 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 f"👤 <b>User:</b> {user.first_name} (@{user.username or 'None'})\n"
                 f"🆔 <b>ID:</b> <code>{user_id}</code>\n"
                 f"📄 <b>File:</b> <code>{filename}</code>\n"
+                f"#️⃣ <b>SHA-256:</b> <code>{digest[:16]}</code>\n"
                 f"⏰ <b>Time:</b> {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}"
             ),
-            parse_mode="HTML"
+            parse_mode="HTML",
+            priority=AUDIT,
         )
-    except Exception as e:
-        print(f"Log send failed: {e}")
 
     if filename.lower() in ["requirements.txt", "system_requirements.txt"]:
+        if not changed:
+            await update.message.reply_text(f"♻️ <b>{filename}</b> same hai, kuch nahi badla.", parse_mode="HTML")
+            return
         msg = "📦 <b>requirements.txt</b> uploaded! → Auto pip install on next start" if filename.lower() == "requirements.txt" else "🔧 <b>system_requirements.txt</b> uploaded! → Auto pkg install on next start"
         await update.message.reply_text(msg + "\n\nFormat: Har line mein ek package name.", parse_mode="HTML")
         return
 
     if filename.endswith(".py"):
-        add_file_tracking(user_id, user_chat_id, filename)
+        bot = add_file_tracking(user_id, user_chat_id, filename)
+        if not changed:
+            await update.message.reply_text(
+                f"♻️ <b>{filename}</b> same content hai — na save karna pada, na restart.",
+                parse_mode="HTML"
+            )
+            return
+        if bot.id in running:
+            # naya code chalte bot pe: restart (purana process purani inode pe tha)
+            job = await start_process(bot.id, context.bot, user_chat_id, user_id)
+            await update.message.reply_text(
+                f"✅ <b>{filename}</b> updated! 🔄 Naye code ke saath restart (Job #{job.id})",
+                parse_mode="HTML"
+            )
+            return
         await update.message.reply_text(
             f"✅ <b>{filename}</b> uploaded!\n\n"
-            "⏰ 30-min logs active\n"
+            f"⏰ {LOG_SHIP_INTERVAL // 60}-min logs active\n"
             "🔄 Manual control\n"
             "🔥 Auto pkg + pip install on start!\n\n"
             "Use /start → Manage Files",
             parse_mode="HTML"
         )
 
+# ================= FILE DETAILS =================
+def file_details(bot):
+    bid = bot.id
+    is_running = bid in running
+    crash = crashed.get(bid)
+    if is_running:
+        m = proc_sampler.samples.get(bid)
+        w = supervisor.watched.get(bid)
+        started = running[bid].get("started") or (w.started if w else None)
+        up = int(m.uptime) if m else int(time.time() - started) if started else 0
+        status = f"🟢 <b>RUNNING</b> (uptime {timedelta(seconds=up)})"
+        if m:
+            status += f"\n⚙️ CPU {m.cpu:.1f}% | 🧠 RSS {m.rss / 1048576:.1f} MB | 🧵 {m.threads} threads"
+    elif crash:
+        status = f"💥 <b>CRASHED</b> (exit <code>{crash['rc']}</code>)"
+        if supervisor.restart_pending(bid):
+            status += f"\n♻️ Auto-restart {crash['delay']}s backoff pe"
+        elif crash["delay"] == -1:
+            status += "\n🛑 Crash loop — auto-restart band"
+    else:
+        status = "🔴 <b>STOPPED</b>"
+    autorestart = bot_settings.get(bid, {}).get("autorestart", False)
+    text = (
+        "📄 <b><u>FILE DETAILS</u></b>\n\n"
+        f"📄 <b>Name:</b> <code>{bot.name}</code>\n"
+        f"🐍 <b>Type:</b> Python\n"
+        f"🏷️ <b>Tags:</b> {' '.join('#' + t for t in sorted(bot.tags)) or '— (/tag se lagao)'}\n"
+        f"📊 <b>Status:</b> {status}\n\n"
+        + "".join(schedule_line(j) + "\n" for j in scheduler.of_bot(bid)) +
+        f"{'♻️ Auto-Restart ON' if autorestart else '🔄 Manual Control'} | Auto Install Active"
+    )
+    kb = []
+    if not is_running:
+        kb.append([InlineKeyboardButton("🚀 START BOT", callback_data=f"start|{bid}")])
+        if supervisor.restart_pending(bid):
+            kb.append([InlineKeyboardButton("🛑 CANCEL RESTART", callback_data=f"stop|{bid}")])
+    else:
+        kb += [[InlineKeyboardButton("🔄 RESTART", callback_data=f"restart|{bid}")],
+               [InlineKeyboardButton("🛑 STOP", callback_data=f"stop|{bid}")]]
+    for j in scheduler.of_bot(bid)[:3]:
+        kb.append([InlineKeyboardButton(f"⏰ RUN NOW #{j.id}", callback_data=f"srun|{j.id}|{bid}")])
+    kb += [[InlineKeyboardButton(f"♻️ AUTO-RESTART: {'ON' if autorestart else 'OFF'}", callback_data=f"ar|{bid}")],
+           [InlineKeyboardButton("📜 VIEW LOGS", callback_data=f"logs|{bid}")],
+           [InlineKeyboardButton("🗑️ DELETE", callback_data=f"delete|{bid}")],
+           [InlineKeyboardButton("◀️ Back", callback_data="files")]]
+    return text, kb
+
+# ================= LOG VIEWER =================
+def log_page(bot, end=None, seg=0):
+    bid = bot.id
+    kb = [
+        [InlineKeyboardButton("◀️ Back to File", callback_data=f"file|{bid}")],
+        [InlineKeyboardButton("📂 All Files", callback_data="files")]
+    ]
+    segments = logview.log_segments(log_path(bot))
+    seg = min(seg, len(segments) - 1)
+    total = logview.seg_size(segments[seg])
+    if total == 0 and len(segments) == 1:
+        return "📜 No logs yet (installing packages ya bot start nahi hua).", kb
+    raw_logs, start, end = logview.read_page(segments[seg], end)
+    safe_logs = html_tail(raw_logs, 3800)
+    nav = []
+    if start > 0:
+        nav.append(InlineKeyboardButton("⬅️ Older", callback_data=f"logp|{seg}.{start}|{bid}"))
+    elif seg + 1 < len(segments):
+        nav.append(InlineKeyboardButton("⬅️ Older", callback_data=f"logp|{seg + 1}.-1|{bid}"))
+    if end < total:
+        nav.append(InlineKeyboardButton("Newer ➡️", callback_data=f"logp|{seg}.{min(end + logview.PAGE_BYTES, total)}|{bid}"))
+    elif seg > 0:
+        nav.append(InlineKeyboardButton("Newer ➡️", callback_data=f"logp|{seg - 1}.{logview.PAGE_BYTES}|{bid}"))
+    if end < total or seg > 0:
+        nav.append(InlineKeyboardButton("⏭️ Latest", callback_data=f"logp|0.-1|{bid}"))
+    else:
+        nav.append(InlineKeyboardButton("🔄 Refresh", callback_data=f"logp|0.-1|{bid}"))
+    where = "live" if seg == 0 else f"archive {seg}/{len(segments) - 1}"
+    return (
+        f"📜 <b>LOGS — {bot.name}</b> <i>({where}: {start:,}–{end:,} / {total:,} bytes)</i>\n<pre>{safe_logs}</pre>",
+        [nav] + kb,
+    )
+
+async def grep_logs(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = update.effective_user.id
+    if len(context.args) < 2:
+        await update.message.reply_text("Usage: /grep <file.py> <text>")
+        return
+    fname, needle = context.args[0], " ".join(context.args[1:])
+    bot = registry.lookup(user_id, fname)
+    if not bot and is_owner(user_id) and "/" in fname:
+        bot = registry.lookup(*fname.split("/", 1))  # owner: /grep <user_id>/<file.py> ...
+    if not bot:
+        await update.message.reply_text("❌ Ye file tumhari nahi hai!")
+        return
+    matches = await asyncio.to_thread(logview.grep_all, log_path(bot), needle)
+    if not matches:
+        await update.message.reply_text(f"🔍 <code>{html_escape(needle)}</code> — koi match nahi mila.", parse_mode="HTML")
+        return
+    body = "\n".join(line[:300] for _, line in matches)
+    await update.message.reply_text(
+        f"🔍 <b>{len(matches)} matches</b> in <code>{bot.name}</code> for <code>{html_escape(needle)}</code>\n"
+        f"<pre>{html_tail(body, 3500)}</pre>",
+        parse_mode="HTML"
+    )
+
 # ================= BUTTON HANDLER =================
+BOT_ACTIONS = ("file", "ar", "start", "restart", "stop", "logs", "logp", "delete", "srun")
+
 async def button(update: Update, context: ContextTypes.DEFAULT_TYPE):
     q = update.callback_query
     await q.answer()
@@ -331,15 +1138,29 @@ async def button(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await q.edit_message_text("🔑 <b>Key daalo:</b>\n\n<code>/enterkey</code>", parse_mode="HTML")
         return
 
+    # Har bot callback: id se O(1) lookup + ownership check (bot id hamesha aakhri field)
+    bot = None
+    if data.split("|", 1)[0] in BOT_ACTIONS:
+        bot = registry.owned(data.rsplit("|", 1)[-1], user_id, is_owner(user_id))
+        if not bot:
+            await q.edit_message_text("❌ Ye file tumhari nahi hai (ya delete ho chuki)!", parse_mode="HTML")
+            return
+
     if data == "status":
-        files = user_files.get(str(user_id), [])
-        running_count = sum(1 for f in files if f in running)
+        files = registry.of_owner(user_id)
+        running_count = sum(1 for b in files if b.id in running)
+        samples = [proc_sampler.samples[b.id] for b in files if b.id in proc_sampler.samples]
+        caps = tier_policy(user_id)
         text = (
             "📊 <b><u>CURRENT STATUS</u></b>\n\n"
             f"👤 <b>User:</b> {q.from_user.first_name}\n"
             f"📂 <b>Total Files:</b> {len(files)}\n"
             f"🟢 <b>Running:</b> {running_count}\n"
-            f"🔴 <b>Stopped:</b> {len(files) - running_count}\n\n"
+            f"🔴 <b>Stopped:</b> {len(files) - running_count}\n"
+            f"⚙️ <b>CPU:</b> {sum(m.cpu for m in samples):.1f}% | "
+            f"🧠 <b>RSS:</b> {sum(m.rss for m in samples) / 1048576:.1f} MB\n"
+            f"⭐ <b>Tier:</b> {key_index.tier_of(str(user_id))} "
+            f"(per bot: {caps['cpu_pct']}% CPU, {caps['mem_mb']} MB, {caps['nproc']} procs, {limiter.mode})\n\n"
             "✅ All features active! Auto pkg + pip 🚀"
         )
         kb = [
@@ -349,130 +1170,200 @@ async def button(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await q.edit_message_text(text, reply_markup=InlineKeyboardMarkup(kb), parse_mode="HTML")
 
     elif data == "files":
-        files = user_files.get(str(user_id), [])
+        files = registry.of_owner(user_id)
         if not files:
             await q.edit_message_text("📂 <b>No files uploaded yet!</b>\nEnter key & upload .py", parse_mode="HTML")
             return
         kb = []
-        for f in sorted(files):
-            status = "🟢 LIVE" if f in running else "🔴 STOPPED"
-            kb.append([InlineKeyboardButton(f"{status} {f}", callback_data=f"file|{f}")])
+        for b in sorted(files, key=lambda b: b.name):
+            status = "🟢 LIVE" if b.id in running else ("💥 CRASHED" if b.id in crashed else "🔴 STOPPED")
+            kb.append([InlineKeyboardButton(f"{status} {b.name}", callback_data=f"file|{b.id}")])
+        if len(files) > 1:
+            kb.append([InlineKeyboardButton("🔄 RESTART ALL", callback_data="bulk|restart|all"),
+                       InlineKeyboardButton("🛑 STOP ALL", callback_data="bulk|stop|all")])
+        for tag in sorted({t for b in files for t in b.tags})[:6]:
+            kb.append([InlineKeyboardButton(f"🔄 #{tag}", callback_data=f"bulk|restart|#{tag}"),
+                       InlineKeyboardButton(f"🛑 #{tag}", callback_data=f"bulk|stop|#{tag}")])
         kb.append([InlineKeyboardButton("◀️ Back", callback_data="status")])
         await q.edit_message_text(f"📂 <b><u>MANAGE FILES</u></b> ({len(files)})\n\nSelect:", reply_markup=InlineKeyboardMarkup(kb), parse_mode="HTML")
 
+    elif data.startswith(("bulk|", "bulkgo|")):
+        # MANAGE FILES bulk buttons: pehle confirm, phir background run + ek summary
+        kind, action, selector = data.split("|", 2)
+        bots = registry.select(registry.of_owner(user_id), selector)
+        if action not in BULK_ICONS or not bots:
+            await q.edit_message_text("❌ Koi bot match nahi hua.", parse_mode="HTML")
+            return
+        title = f"{BULK_ICONS[action]} <b>Bulk {action.upper()}</b> <code>{html_escape(selector)}</code> — {len(bots)} bots"
+        if kind == "bulk":
+            kb = [
+                [InlineKeyboardButton("✅ Confirm", callback_data=f"bulkgo|{action}|{selector}")],
+                [InlineKeyboardButton("◀️ Back", callback_data="files")]
+            ]
+            await q.edit_message_text(f"{title}\n\nPakka?", reply_markup=InlineKeyboardMarkup(kb), parse_mode="HTML")
+            return
+        await q.edit_message_text(f"⏳ {title}\n\n{BULK_CONCURRENCY} parallel, summary yahin aayegi...", parse_mode="HTML")
+        context.application.create_task(
+            run_bulk(action, selector, bots, user_id, user_chat_id, q.message.message_id))
+
     elif data.startswith("file|"):
-        _, fname = data.split("|", 1)
-        is_running = fname in running
-        status = "🟢 <b>RUNNING</b>" if is_running else "🔴 <b>STOPPED</b>"
-        text = (
-            "📄 <b><u>FILE DETAILS</u></b>\n\n"
-            f"📄 <b>Name:</b> <code>{fname}</code>\n"
-            f"🐍 <b>Type:</b> Python\n"
-            f"📊 <b>Status:</b> {status}\n\n"
-            "🔄 Manual Control | Auto Install Active"
-        )
-        kb = []
-        if not is_running:
-            kb.append([InlineKeyboardButton("🚀 START BOT", callback_data=f"start|{fname}")])
-        else:
-            kb += [[InlineKeyboardButton("🔄 RESTART", callback_data=f"restart|{fname}")],
-                   [InlineKeyboardButton("🛑 STOP", callback_data=f"stop|{fname}")]]
-        kb += [[InlineKeyboardButton("📜 VIEW LOGS", callback_data=f"logs|{fname}")],
-               [InlineKeyboardButton("🗑️ DELETE", callback_data=f"delete|{fname}")],
-               [InlineKeyboardButton("◀️ Back", callback_data="files")]]
+        text, kb = file_details(bot)
+        await q.edit_message_text(text, reply_markup=InlineKeyboardMarkup(kb), parse_mode="HTML")
+
+    elif data.startswith("srun|"):
+        job = scheduler.jobs.get(data.split("|")[1])
+        if not job or job.bot != bot.id:
+            await q.edit_message_text("⏰ Schedule mila nahi.", parse_mode="HTML")
+            return
+        scheduler.fire(job)  # pichla run chal raha ho to skip (history mein dikhega)
+        text, kb = file_details(bot)
+        await q.edit_message_text(text, reply_markup=InlineKeyboardMarkup(kb), parse_mode="HTML")
+
+    elif data.startswith("ar|"):
+        settings = bot_settings.setdefault(bot.id, {})
+        settings["autorestart"] = not settings.get("autorestart", False)
+        store.put("bot_settings", bot.id, settings)
+        if bot.id in supervisor.watched:
+            supervisor.watched[bot.id].autorestart = settings["autorestart"]
+        text, kb = file_details(bot)
         await q.edit_message_text(text, reply_markup=InlineKeyboardMarkup(kb), parse_mode="HTML")
 
     elif data.startswith(("start|", "restart|")):
-        _, fname = data.split("|", 1)
-        await start_process(fname, context, user_chat_id, user_id)
-        action = "RESTARTED" if data.startswith("restart") else "STARTED"
+        job = await start_process(bot.id, context.bot, user_chat_id, user_id)
+        action = "RESTART" if data.startswith("restart") else "START"
         kb = [
-            [InlineKeyboardButton("◀️ Back to File", callback_data=f"file|{fname}")],
+            [InlineKeyboardButton("📋 Job Status", callback_data=f"job|{job.id}")],
+            [InlineKeyboardButton("◀️ Back to File", callback_data=f"file|{bot.id}")],
             [InlineKeyboardButton("📂 All Files", callback_data="files")],
             [InlineKeyboardButton("📊 Status", callback_data="status")]
         ]
         await q.edit_message_text(
-            f"🟢 <b>{fname}</b> {action} Successfully! ✅\n\nAuto pkg + pip complete!\nLogs live aa rahe hain!",
+            f"⏳ <b>{bot.name}</b> {action} queued — <b>Job #{job.id}</b>\n\n"
+            "Auto pkg + pip background mein chal raha hai,\nprogress yahin live aayega!",
             reply_markup=InlineKeyboardMarkup(kb),
             parse_mode="HTML"
         )
-        try:
-            await context.bot.send_message(LOG_GC_ID, f"▶️ <b>{fname}</b> {action} by <code>{user_id}</code>", parse_mode="HTML")
-        except: pass
+        outbox.audit(LOG_GC_ID, f"▶️ <b>{bot.name}</b> {action} (Job #{job.id}) by <code>{user_id}</code>")
 
-    elif data.startswith("stop|"):
-        _, fname = data.split("|", 1)
-        if fname in running:
-            running[fname]["proc"].terminate()
-            running[fname]["log_file"].close()
-            running[fname]["periodic_task"].cancel()
-            del running[fname]
+    elif data.startswith("job|"):
+        _, jid = data.split("|", 1)
+        job = install_pool.jobs.get(int(jid))
+        if not job or not registry.owned(job.bot, user_id, is_owner(user_id)):
+            await q.edit_message_text("📋 Job purana ho gaya ya mila nahi.", parse_mode="HTML")
+            return
         kb = [
-            [InlineKeyboardButton("◀️ Back to File", callback_data=f"file|{fname}")],
-            [InlineKeyboardButton("📂 All Files", callback_data="files")]
+            [InlineKeyboardButton("🔄 Refresh", callback_data=f"job|{job.id}")],
+            [InlineKeyboardButton("◀️ Back to File", callback_data=f"file|{job.bot}")]
         ]
-        await q.edit_message_text(f"🔴 <b>{fname}</b> STOPPED 🛑", reply_markup=InlineKeyboardMarkup(kb), parse_mode="HTML")
-        await context.bot.send_message(LOG_GC_ID, f"⏹️ <b>{fname}</b> STOPPED by <code>{user_id}</code>", parse_mode="HTML")
+        await q.edit_message_text(job_text(job), reply_markup=InlineKeyboardMarkup(kb), parse_mode="HTML")
 
-    elif data.startswith("logs|"):
-        _, fname = data.split("|", 1)
-        log_path = f"{LOG_DIR}/{fname}.log"
+    elif data.startswith("stop|"):
+        install_pool.cancel(bot.id)
+        forget_desired(bot.id)
+        await stop_process(bot.id)
         kb = [
-            [InlineKeyboardButton("◀️ Back to File", callback_data=f"file|{fname}")],
+            [InlineKeyboardButton("◀️ Back to File", callback_data=f"file|{bot.id}")],
             [InlineKeyboardButton("📂 All Files", callback_data="files")]
         ]
-        if os.path.exists(log_path) and os.path.getsize(log_path) > 0:
-            with open(log_path, "r", errors="ignore") as f:
-                raw_logs = f.read()[-3800:]
-            safe_logs = raw_logs.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-            await q.message.reply_text(
-                f"📜 <b>LOGS — {fname}</b>\n<pre>{safe_logs}</pre>",
-                reply_markup=InlineKeyboardMarkup(kb),
-                parse_mode="HTML"
-            )
-        else:
-            await q.message.reply_text("📜 No logs yet (installing packages ya bot start nahi hua).", reply_markup=InlineKeyboardMarkup(kb), parse_mode="HTML")
+        await q.edit_message_text(f"🔴 <b>{bot.name}</b> STOPPED 🛑", reply_markup=InlineKeyboardMarkup(kb), parse_mode="HTML")
+        outbox.audit(LOG_GC_ID, f"⏹️ <b>{bot.name}</b> STOPPED by <code>{user_id}</code>")
+
+    elif data.startswith("logs|"):
+        text, kb = log_page(bot)
+        await q.message.reply_text(text, reply_markup=InlineKeyboardMarkup(kb), parse_mode="HTML")
+
+    elif data.startswith("logp|"):
+        _, pos, _ = data.split("|", 2)
+        seg, end = (int(x) for x in pos.split("."))
+        text, kb = log_page(bot, end if end >= 0 else None, seg)
+        await q.edit_message_text(text, reply_markup=InlineKeyboardMarkup(kb), parse_mode="HTML")
 
     elif data.startswith("delete|"):
-        _, fname = data.split("|", 1)
-        if fname in running:
-            running[fname]["proc"].terminate()
-            running[fname]["log_file"].close()
-            running[fname]["periodic_task"].cancel()
-            del running[fname]
-        paths = [os.path.join(UPLOAD_DIR, fname), f"{LOG_DIR}/{fname}.log"]
-        for p in paths:
-            if os.path.exists(p): os.remove(p)
-        remove_file_tracking(user_id, user_chat_id, fname)
+        install_pool.cancel(bot.id)
+        forget_desired(bot.id)
+        await stop_process(bot.id)
+        if bot.id in bot_settings:
+            del bot_settings[bot.id]
+            store.delete("bot_settings", bot.id)
+        path = upload_path(bot)
+        if os.path.exists(path): os.remove(path)
+        asyncio.create_task(asyncio.to_thread(blobs.gc))
+        logrotate.remove_all(log_path(bot))
+        unschedule_bot(bot.id)
+        remove_file_tracking(bot.id)
         kb = [[InlineKeyboardButton("📂 Manage Files", callback_data="files")]]
-        await q.edit_message_text(f"🗑️ <b>{fname}</b> DELETED permanently!", reply_markup=InlineKeyboardMarkup(kb), parse_mode="HTML")
-        await context.bot.send_message(LOG_GC_ID, f"🗑️ <b>{fname}</b> DELETED by <code>{user_id}</code>", parse_mode="HTML")
+        await q.edit_message_text(f"🗑️ <b>{bot.name}</b> DELETED permanently!", reply_markup=InlineKeyboardMarkup(kb), parse_mode="HTML")
+        outbox.audit(LOG_GC_ID, f"🗑️ <b>{bot.name}</b> DELETED by <code>{user_id}</code>")
 
 # ================= MAIN =================
+async def post_init(app: Application):
+    global tg_bot
+    tg_bot = app.bot
+    supervisor.start()
+    app.create_task(proc_sampler.run(lambda: {f: (r["pid"], r.get("started")) for f, r in running.items()}, SAMPLE_INTERVAL))
+    app.create_task(store.run_compactor())
+    outbox.start(app.bot)
+    log_shipper.start(app.bot, outbox)
+    app.create_task(log_rotator.run())
+    if warm_pool:
+        for _ in range(WARM_POOL):
+            warm_pool.fill(env_cache.python(None))  # base interpreter; venvs demand pe
+    app.create_task(restore_fleet())
+    app.create_task(key_sweeper())
+    scheduler.start()
+    app.create_task(prom.watch_loop_lag(loop_lag, loop_lag_last))
+    if METRICS_ADDR:
+        app.bot_data["metrics_runner"] = await prom.serve(metrics, METRICS_ADDR)
+
+async def post_shutdown(app: Application):
+    runner = app.bot_data.get("metrics_runner")
+    if runner:
+        await runner.cleanup()
+    if warm_pool:
+        warm_pool.close()
+    store.close()
+
 def main():
-    app = Application.builder().token(BOT_TOKEN).build()
+    builder = Application.builder().token(BOT_TOKEN).post_init(post_init).post_shutdown(post_shutdown)
+    if CONCURRENT_UPDATES > 1:
+        # Alag users parallel; ek user ke updates (conversation, upload -> button) order mein
+        builder = builder.concurrent_updates(PerUserProcessor(CONCURRENT_UPDATES))
+    app = builder.build()
 
-    app.add_handler(CommandHandler("start", start))
-    app.add_handler(CommandHandler("gkey", gkey))
+    app.add_handler(CommandHandler("start", timed("/start", start)))
+    app.add_handler(CommandHandler("gkey", timed("/gkey", gkey)))
+    app.add_handler(CommandHandler("keys", timed("/keys", list_keys)))
+    app.add_handler(CommandHandler("grep", timed("/grep", grep_logs)))
+    app.add_handler(CommandHandler("outbox", timed("/outbox", outbox_stats)))
+    app.add_handler(CommandHandler("profile", profile_cmd))
+    app.add_handler(CommandHandler("fleet", timed("/fleet", fleet)))
+    app.add_handler(CommandHandler("tag", timed("/tag", tag_cmd)))
+    app.add_handler(CommandHandler("schedule", timed("/schedule", schedule_cmd)))
+    app.add_handler(CommandHandler("unschedule", timed("/unschedule", unschedule_cmd)))
     app.add_handler(ConversationHandler(
         entry_points=[CommandHandler("enterkey", enterkey)],
-        states={0: [MessageHandler(filters.TEXT & ~filters.COMMAND, check_key)]},
+        states={0: [MessageHandler(filters.TEXT & ~filters.COMMAND, timed("check_key", check_key))]},
         fallbacks=[]
     ))
-    app.add_handler(MessageHandler(filters.Document.ALL, handle_document))
-    app.add_handler(CallbackQueryHandler(button))
+    app.add_handler(MessageHandler(filters.Document.ALL, timed("document", handle_document)))
+    app.add_handler(CallbackQueryHandler(timed(callback_kind, button)))
 
     async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
         print("Error:", traceback.format_exc())
         if OWNER_ID:
-            try:
-                await context.bot.send_message(OWNER_ID, f"⚠️ Bot Error:\n<pre>{traceback.format_exc()[-3000:]}</pre>", parse_mode="HTML")
-            except: pass
+            # error burst: pending report ko latest se replace, flood nahi
+            outbox.send(OWNER_ID, f"⚠️ Bot Error:\n<pre>{html_tail(traceback.format_exc(), 3000)}</pre>",
+                        priority=AUDIT, key="error")
 
     app.add_error_handler(error_handler)
 
     print("🚀💚 ULTIMATE PRO MANAGER BOT STARTED | AUTO PKG + PIP ACTIVE! 💚🚀")
-    app.run_polling(drop_pending_updates=True)
+    if WEBHOOK_URL:
+        secret = WEBHOOK_SECRET or secrets.token_urlsafe(32)
+        run_webhook(app, WEBHOOK_LISTEN, WEBHOOK_PATH, secret, WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+                    allowed_updates=Update.ALL_TYPES)
+    else:
+        app.run_polling(drop_pending_updates=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
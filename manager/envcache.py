@@ -0,0 +1,184 @@
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import hashlib
+
+from manager.installer import run_logged
+
+# ================= CONTENT-HASHED VENV CACHE =================
+# Har requirements set ka apna virtualenv: envs/<sha256[:16]>/.
+# Same requirements wale bots ek hi prebuilt env share karte hain; unchanged
+# requirements pe restart pip ko chhoota bhi nahi. Wheels envs/.pip-cache mein
+# shared hain. Disk budget envs + pip cache dono ka: upar jaate hi pehle pip cache
+# ki purani files (budget ke 1/4 tak), phir LRU (marker mtime) se purane envs.
+
+MARKER = ".ready"
+
+
+def normalize_requirements(text):
+    lines = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            lines.append(line)
+    return sorted(set(lines))
+
+
+def dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.lstat(os.path.join(root, f)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class EnvCache:
+    def __init__(self, root, budget_mb=2048, base_python=sys.executable):
+        self.root = root
+        self.budget = budget_mb * 1024 * 1024
+        self.base_python = base_python
+        self.pip_cache = os.path.join(root, ".pip-cache")
+        self._building = {}
+        os.makedirs(self.pip_cache, exist_ok=True)
+
+    def key_for(self, req_path):
+        with open(req_path, "r", errors="ignore") as f:
+            reqs = normalize_requirements(f.read())
+        h = hashlib.sha256()
+        h.update(f"{sys.version_info[0]}.{sys.version_info[1]}\n".encode())
+        h.update("\n".join(reqs).encode())
+        return h.hexdigest()[:16]
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def python(self, key):
+        if key is None:
+            return self.base_python
+        return os.path.join(self.path(key), "bin", "python")
+
+    def is_ready(self, key):
+        return os.path.exists(os.path.join(self.path(key), MARKER))
+
+    def touch(self, key):
+        try:
+            os.utime(os.path.join(self.path(key), MARKER))
+        except OSError:
+            pass
+
+    async def ensure(self, key, req_path, log_path, on_output=None):
+        if self.is_ready(key):
+            self.touch(key)
+            return 0
+        # Same hash ka build already chal raha hai -> usi ka result share karo
+        if key in self._building:
+            return await asyncio.shield(self._building[key])
+        fut = asyncio.get_running_loop().create_future()
+        self._building[key] = fut
+        try:
+            rc = await self._build(key, req_path, log_path, on_output)
+            fut.set_result(rc)
+            return rc
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # "never retrieved" warning band
+            raise
+        finally:
+            del self._building[key]
+
+    async def _build(self, key, req_path, log_path, on_output):
+        env = self.path(key)
+        if os.path.exists(env):
+            await asyncio.to_thread(shutil.rmtree, env, True)  # adhura build
+        rc = await run_logged([self.base_python, "-m", "venv", env], log_path, on_output)
+        if rc != 0:
+            return rc
+        rc = await run_logged(
+            [self.python(key), "-m", "pip", "install", "--cache-dir", self.pip_cache,
+             "--disable-pip-version-check", "-r", req_path],
+            log_path, on_output,
+        )
+        if rc != 0:
+            await asyncio.to_thread(shutil.rmtree, env, True)
+            return rc
+        with open(req_path, "r", errors="ignore") as f:
+            reqs = normalize_requirements(f.read())
+        size = await asyncio.to_thread(dir_size, env)
+        with open(os.path.join(env, MARKER), "w") as f:
+            json.dump({"size": size, "created": time.time(), "requirements": reqs}, f)
+        return 0
+
+    def entries(self):
+        out = []
+        for name in os.listdir(self.root):
+            marker = os.path.join(self.root, name, MARKER)
+            if name.startswith(".") or not os.path.exists(marker):
+                continue
+            try:
+                with open(marker, "r") as f:
+                    size = json.load(f).get("size", 0)
+            except (OSError, ValueError):
+                size = 0
+            out.append((os.path.getmtime(marker), name, size))
+        return sorted(out)
+
+    def cache_files(self):
+        """pip cache ki files, sabse purani pehle: [(mtime, path, size)]."""
+        out = []
+        for root, _, files in os.walk(self.pip_cache):
+            for f in files:
+                path = os.path.join(root, f)
+                try:
+                    st = os.lstat(path)
+                except OSError:
+                    continue
+                out.append((st.st_mtime, path, st.st_size))
+        return sorted(out)
+
+    def _trim_cache(self, files, total, keep):
+        # files mein se purani hatao jab tak total budget mein ya cache <= keep
+        cache = sum(size for _, _, size in files)
+        while files and total > self.budget and cache > keep:
+            _, path, size = files.pop(0)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            cache -= size
+            total -= size
+        return total
+
+    def evict(self, pinned=()):
+        entries = self.entries()
+        files = [] if self._building else self.cache_files()  # build chal raha ho to pip cache mat chhedo
+        total = sum(size for _, _, size in entries) + sum(size for _, _, size in files)
+        total = self._trim_cache(files, total, self.budget // 4)
+        removed = []
+        for _, name, size in entries:
+            if total <= self.budget:
+                break
+            if name in pinned or name in self._building:
+                continue
+            shutil.rmtree(self.path(name), ignore_errors=True)
+            total -= size
+            removed.append(name)
+        self._trim_cache(files, total, 0)
+        return removed
+
+    # ---------- system packages (pkg) ----------
+    # pkg install system-wide hota hai; ek baar successful set ka marker rakh lo
+    def pkg_key(self, packages):
+        return hashlib.sha256("\n".join(sorted(set(packages))).encode()).hexdigest()[:16]
+
+    def pkg_done(self, key):
+        return os.path.exists(os.path.join(self.root, f".pkg-{key}.ok"))
+
+    def mark_pkg(self, key):
+        with open(os.path.join(self.root, f".pkg-{key}.ok"), "w") as f:
+            f.write(str(time.time()))
@@ -0,0 +1,101 @@
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+
+# ================= UPLOAD INGESTION =================
+# Download pehle same directory ki temp file mein, phir SHA-256 blob
+# (uploads/.blobs/ab/<sha>) aur bot ka path us blob ka hardlink, os.replace se.
+# Adhoori file kabhi chalte bot ki script replace nahi karti; same content dobara
+# aaye to na disk write na restart.
+
+CHUNK = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class BlobStore:
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()  # commit vs gc (dono worker threads mein)
+        os.makedirs(root, exist_ok=True)
+
+    def blob_path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def temp_path(self, dest):
+        d = os.path.dirname(dest)
+        os.makedirs(d, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".upload-", suffix=".part", dir=d)
+        os.close(fd)
+        return tmp
+
+    def same(self, dest, digest):
+        if not os.path.exists(dest):
+            return False
+        blob = self.blob_path(digest)
+        if os.path.exists(blob) and os.path.samefile(dest, blob):
+            return True  # hardlink -> hash karne ki zaroorat nahi
+        return sha256_file(dest) == digest
+
+    def commit(self, tmp, dest):
+        """tmp -> blob -> dest (atomic). (digest, changed); changed False = identical upload."""
+        if os.path.getsize(tmp) > self.max_bytes:
+            os.remove(tmp)
+            raise UploadTooLarge(self.max_bytes)
+        digest = sha256_file(tmp)
+        with self._lock:
+            return digest, self._commit(tmp, dest, digest)
+
+    def _commit(self, tmp, dest, digest):
+        if self.same(dest, digest):
+            os.remove(tmp)
+            return False
+        blob = self.blob_path(digest)
+        if os.path.exists(blob):
+            os.remove(tmp)  # ye content pehle se store hai (kisi aur user/file ka)
+        else:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.replace(tmp, blob)
+        link = self.temp_path(dest)
+        os.remove(link)
+        try:
+            os.link(blob, link)
+        except OSError:
+            shutil.copyfile(blob, link)  # hardlink support nahi (kuch Android FS)
+        os.replace(link, dest)
+        return True
+
+    def gc(self):
+        # Jis blob ka koi hardlink nahi bacha (nlink == 1) woh kisi bot ka nahi
+        with self._lock:
+            return self._gc()
+
+    def _gc(self):
+        removed = 0
+        for sub in os.listdir(self.root):
+            d = os.path.join(self.root, sub)
+            if not os.path.isdir(d):
+                continue
+            for name in os.listdir(d):
+                p = os.path.join(d, name)
+                try:
+                    if os.stat(p).st_nlink == 1:
+                        os.remove(p)
+                        removed += 1
+                except OSError:
+                    pass
+        return removed
+
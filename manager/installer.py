@@ -0,0 +1,197 @@
+import time
+import asyncio
+import itertools
+from collections import deque
+
+# ================= INSTALL JOB POOL =================
+# pkg/pip installs asyncio subprocesses mein chalte hain, event loop kabhi block nahi hota.
+# N workers ek shared ready-queue se bots uthate hain; ek bot ke jobs hamesha
+# order mein, ek ke baad ek chalte hain (per-bot queue).
+
+_ids = itertools.count(1)
+
+
+async def run_logged(argv, log_path, on_output=None):
+    with open(log_path, "ab", buffering=0) as log:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *argv,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+        except OSError as e:
+            log.write(f"{argv[0]}: {e}\n".encode())
+            if on_output:
+                await on_output(f"{argv[0]}: {e}")
+            return 127
+        while True:
+            # pip ke progress bars \r wali lambi lines dete hain, isliye chunks padhte hain
+            chunk = await proc.stdout.read(65536)
+            if not chunk:
+                break
+            log.write(chunk)
+            if on_output:
+                await on_output(chunk.decode(errors="ignore"))
+        return await proc.wait()
+
+
+class InstallStep:
+    def __init__(self, label, argv=None, log_path=None, run=None):
+        self.label = label
+        self.argv = argv
+        self.log_path = log_path
+        self.run = run
+        self.returncode = None
+
+
+class InstallJob:
+    def __init__(self, bot, steps, notify=None, on_done=None, meta=None):
+        self.id = next(_ids)
+        self.bot = bot
+        self.steps = steps
+        self.notify = notify
+        self.on_done = on_done
+        self.meta = meta or {}
+        self.state = "queued"
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.tail = deque(maxlen=12)
+        self.done = asyncio.Event()
+        self.cancelled = False
+        self.progress_interval = 3.0
+        self._last_progress = 0.0
+
+    @property
+    def ok(self):
+        return all(s.returncode == 0 for s in self.steps)
+
+    @property
+    def duration(self):
+        if not self.started:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    async def output(self, text):
+        for line in text.replace("\r", "\n").splitlines():
+            if line.strip():
+                self.tail.append(line)
+        if time.monotonic() - self._last_progress >= self.progress_interval:
+            self._last_progress = time.monotonic()
+            await self._emit("progress", "\n".join(self.tail))
+
+    async def _emit(self, event, text=""):
+        if self.notify:
+            try:
+                await self.notify(self, event, text)
+            except Exception as e:
+                print(f"Install notify failed: {e}")
+
+
+class InstallPool:
+    def __init__(self, workers=2, progress_interval=3.0):
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self.jobs = {}
+        self._pending = {}
+        self._active = {}
+        self._ready = None
+        self._tasks = []
+
+    def start(self):
+        if self._tasks:
+            return
+        self._ready = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, bot, steps, notify=None, on_done=None, meta=None):
+        self.start()
+        queue = self._pending.get(bot)
+        # Same bot ka ek job pehle se queue mein hai -> wahi handle lauta do
+        if queue:
+            return queue[-1]
+        job = InstallJob(bot, steps, notify, on_done, meta)
+        job.progress_interval = self.progress_interval
+        self.jobs[job.id] = job
+        if len(self.jobs) > 500:
+            for jid in list(self.jobs)[:100]:
+                if self.jobs[jid].done.is_set():
+                    del self.jobs[jid]
+        self._pending.setdefault(bot, deque()).append(job)
+        if bot not in self._active:
+            self._ready.put_nowait(bot)
+        return job
+
+    @property
+    def depth(self):
+        return sum(len(q) for q in self._pending.values())
+
+    def position(self, job):
+        """Is job ki queue position (1 = agla); queued nahi to 0."""
+        if job.state != "queued":
+            return 0
+        # ready queue mein bots hain (jobs nahi); cancel ke baad wali stale entries mat gino
+        ahead = [b for b in self._ready._queue if self._pending.get(b)]
+        if job.bot in ahead:
+            return ahead.index(job.bot) + 1
+        return len(ahead) + 1  # apne bot ka pichla job chal raha hai -> uske baad peeche lagega
+
+    def active_job(self, bot):
+        return self._active.get(bot)
+
+    def cancel(self, bot):
+        for job in self._pending.pop(bot, ()):
+            job.state = "cancelled"
+            job.done.set()
+        # chalta step poora hone do (env cache adha na rahe), par aage ke steps
+        # aur on_done (launch) nahi - stop ke baad bot wapas start na ho
+        job = self._active.get(bot)
+        if job:
+            job.cancelled = True
+
+    async def _worker(self):
+        while True:
+            bot = await self._ready.get()
+            queue = self._pending.get(bot)
+            if not queue:
+                continue
+            job = queue.popleft()
+            if not queue:
+                del self._pending[bot]
+            self._active[bot] = job
+            try:
+                await self._run(job)
+            except Exception as e:
+                print(f"Install job #{job.id} crashed: {e}")
+                job.state = "failed"
+            finally:
+                job.finished = job.finished or time.time()
+                job.done.set()
+                del self._active[bot]
+                if bot in self._pending:
+                    self._ready.put_nowait(bot)
+
+    async def _run(self, job):
+        job.state = "running"
+        job.started = time.time()
+        await job._emit("start")
+        for step in job.steps:
+            if job.cancelled:
+                break
+            await job._emit("step", step.label)
+            step.returncode = await self._exec(job, step)
+            await job._emit("step_done", step.label)
+        job.finished = time.time()
+        if job.cancelled:
+            job.state = "cancelled"
+            await job._emit("done")
+            return
+        job.state = "done" if job.ok else "failed"
+        if job.on_done:
+            await job.on_done(job)
+        await job._emit("done")
+
+    async def _exec(self, job, step):
+        if step.run:
+            return await step.run(job, step)
+        return await run_logged(step.argv, step.log_path, job.output)
@@ -0,0 +1,160 @@
+import time
+import heapq
+import secrets
+import string
+from itertools import islice
+from datetime import datetime, timezone
+
+# ================= ACCESS KEYS =================
+# Compact record (epoch expiry, used_by set) + indexes: user -> keys,
+# name word -> keys, aur expiry min-heap (lazy deletion) sweeper ke liye.
+# Koi bhi lookup poori table scan nahi karta.
+
+ALPHABET = string.ascii_uppercase + string.digits
+KEY_LEN = 16
+
+
+class KeyRecord:
+    __slots__ = ("expiry", "max_bots", "name", "tier", "used_by")
+
+    def __init__(self, expiry, max_bots, name, tier, used_by=()):
+        self.expiry = expiry
+        self.max_bots = max_bots
+        self.name = name
+        self.tier = tier
+        self.used_by = set(used_by)
+
+    def encode(self):
+        return {"e": int(self.expiry), "m": self.max_bots, "n": self.name, "t": self.tier,
+                "u": sorted(self.used_by)}
+
+    @classmethod
+    def decode(cls, v):
+        """(record, legacy); legacy = purana {"expiry": iso, "used_by": [...]} format."""
+        if "e" in v:
+            return cls(v["e"], v["m"], v["n"], v.get("t"), v.get("u", ())), False
+        expiry = datetime.fromisoformat(v["expiry"]).replace(tzinfo=timezone.utc).timestamp()
+        return cls(expiry, v["max_bots"], v.get("name", ""), v.get("tier"), v.get("used_by", ())), True
+
+
+def _words(name):
+    return {w for w in name.lower().split() if w}
+
+
+class KeyIndex:
+    def __init__(self, tiers, default_tier):
+        self.tiers = list(tiers)
+        self.default_tier = default_tier
+        self.keys = {}
+        self.by_user = {}
+        self.by_word = {}
+        self._heap = []
+
+    def load(self, table):
+        """Records index karo; legacy format wali keys lautao (compact mein dobara save ke liye)."""
+        legacy = []
+        for key, v in table.items():
+            rec, old = KeyRecord.decode(v)
+            self.add(key, rec)
+            if old:
+                legacy.append(key)
+        return legacy
+
+    def add(self, key, rec):
+        self.keys[key] = rec
+        heapq.heappush(self._heap, (rec.expiry, key))
+        for uid in rec.used_by:
+            self.by_user.setdefault(uid, set()).add(key)
+        for w in _words(rec.name):
+            self.by_word.setdefault(w, set()).add(key)
+
+    def remove(self, key):
+        rec = self.keys.pop(key, None)
+        if rec is None:
+            return None
+        for uid in rec.used_by:
+            _discard(self.by_user, uid, key)
+        for w in _words(rec.name):
+            _discard(self.by_word, w, key)
+        return rec  # heap entry lazily skip hoga
+
+    def create(self, days, max_bots, name, tier, n=1):
+        expiry = time.time() + days * 86400
+        made = []
+        while len(made) < n:
+            key = "".join(secrets.choice(ALPHABET) for _ in range(KEY_LEN))
+            if key in self.keys:
+                continue
+            self.add(key, KeyRecord(expiry, max_bots, name, tier))
+            made.append(key)
+        return made
+
+    # ---------- validation ----------
+    def redeem(self, key, uid, now=None):
+        """None = invalid/expired/full; True = naya user add hua (save karo); False = pehle se."""
+        rec = self.keys.get(key)
+        if rec is None or (now or time.time()) > rec.expiry:
+            return None
+        if uid in rec.used_by:
+            return False
+        if len(rec.used_by) >= rec.max_bots:
+            return None
+        rec.used_by.add(uid)
+        self.by_user.setdefault(uid, set()).add(key)
+        return True
+
+    def valid_keys(self, uid, now=None):
+        now = now or time.time()
+        return [k for k in self.by_user.get(uid, ()) if self.keys[k].expiry >= now]
+
+    def tier_of(self, uid, now=None):
+        best = self.default_tier
+        for k in self.valid_keys(uid, now):
+            tier = self.keys[k].tier
+            if tier in self.tiers and self.tiers.index(tier) > self.tiers.index(best):
+                best = tier
+        return best
+
+    # ---------- expiry ----------
+    def next_expiry(self):
+        while self._heap:
+            expiry, key = self._heap[0]
+            rec = self.keys.get(key)
+            if rec is not None and rec.expiry == expiry:
+                return expiry
+            heapq.heappop(self._heap)  # stale entry
+        return None
+
+    def pop_expired(self, now=None):
+        now = now or time.time()
+        expired = []
+        while self._heap and self._heap[0][0] < now:
+            expiry, key = heapq.heappop(self._heap)
+            rec = self.keys.get(key)
+            if rec is not None and rec.expiry == expiry:
+                expired.append((key, self.remove(key)))
+        return expired
+
+    # ---------- listing / search ----------
+    def recent(self, offset=0, limit=20):
+        """Naye pehle; sirf offset + limit entries tak iterate."""
+        return [(k, self.keys[k]) for k in islice(reversed(self.keys), offset, offset + limit)]
+
+    def search(self, query, limit=20):
+        query = query.strip()
+        if query.upper() in self.keys:
+            return [(query.upper(), self.keys[query.upper()])]
+        if query.isdigit() and query in self.by_user:
+            found = self.by_user[query]
+        else:
+            sets = [self.by_word.get(w, set()) for w in _words(query)]
+            found = set.intersection(*sets) if sets else set()
+        return [(k, self.keys[k]) for k in islice(found, limit)]
+
+
+def _discard(index, k, v):
+    s = index.get(k)
+    if s is not None:
+        s.discard(v)
+        if not s:
+            del index[k]
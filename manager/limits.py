@@ -0,0 +1,150 @@
+import os
+import re
+import resource
+
+# ================= PER-BOT RESOURCE LIMITS =================
+# cgroups v2 available ho (aur delegate ho sake) to har bot ka apna cgroup:
+# cpu.max / memory.max / pids.max. Child khud preexec_fn mein apne cgroup mein
+# chala jaata hai, isliye exec se pehle hi limits lag jaati hain.
+# Fallback: setrlimit (DATA, NOFILE, NPROC headroom) + nice for CPU.
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+CONTROLLERS = ("cpu", "memory", "pids")
+
+
+def _write(path, value):
+    with open(path, "w") as f:
+        f.write(value)
+
+
+def _read(path):
+    with open(path, "r") as f:
+        return f.read().strip()
+
+
+def _own_cgroup():
+    with open("/proc/self/cgroup", "r") as f:
+        for line in f:
+            if line.startswith("0::"):
+                return (CGROUP_ROOT + line[3:].strip()).rstrip("/")
+    return None
+
+
+def uid_tasks():
+    # RLIMIT_NPROC real uid ke saare threads ginta hai
+    uid, n = os.getuid(), 0
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            st = os.stat(f"/proc/{pid}")
+            if st.st_uid == uid:
+                n += len(os.listdir(f"/proc/{pid}/task"))
+        except OSError:
+            pass
+    return n
+
+
+class Limiter:
+    def __init__(self, use_cgroups=True):
+        self.root = self._setup_cgroup() if use_cgroups else None
+
+    @property
+    def mode(self):
+        return "cgroup v2" if self.root else "rlimit"
+
+    def _setup_cgroup(self):
+        try:
+            if not os.path.exists(f"{CGROUP_ROOT}/cgroup.controllers"):
+                return None
+            own = _own_cgroup()
+            if own is None:
+                return None
+            # "no internal processes" rule: manager ko <base>/manager leaf mein daalo
+            base = os.path.dirname(own) if os.path.basename(own) == "manager" else own
+            mgr, bots = f"{base}/manager", f"{base}/bots"
+            os.makedirs(mgr, exist_ok=True)
+            os.makedirs(bots, exist_ok=True)
+            if own != mgr:
+                _write(f"{mgr}/cgroup.procs", str(os.getpid()))
+            available = _read(f"{base}/cgroup.controllers").split()
+            wanted = " ".join(f"+{c}" for c in CONTROLLERS if c in available)
+            _write(f"{base}/cgroup.subtree_control", wanted)
+            _write(f"{bots}/cgroup.subtree_control", wanted)
+            return bots
+        except OSError:
+            return None
+
+    def cgroup_path(self, bot):
+        return f"{self.root}/{re.sub(r'[^A-Za-z0-9_.-]', '_', bot)}" if self.root else None
+
+    def prepare(self, bot, caps):
+        """cgroup bana ke limits likho; fail ho to None (rlimit fallback)."""
+        path = self.cgroup_path(bot)
+        if not path:
+            return None
+        try:
+            os.makedirs(path, exist_ok=True)
+            cpu = caps.get("cpu_pct")
+            _write(f"{path}/cpu.max", f"{int(cpu * 1000)} 100000" if cpu else "max 100000")
+            mem = caps.get("mem_mb")
+            _write(f"{path}/memory.max", str(mem * 1024 * 1024) if mem else "max")
+            nproc = caps.get("nproc")
+            _write(f"{path}/pids.max", str(nproc) if nproc else "max")
+            return path
+        except OSError:
+            return None
+
+    def release(self, bot):
+        path = self.cgroup_path(bot)
+        if path:
+            try:
+                os.rmdir(path)
+            except OSError:
+                pass
+
+    def spec(self, caps, cgroup=None):
+        """Limits ka JSON-able roop: preexec_fn ya pre-warmed child (apply) dono ke liye."""
+        return {
+            "cgroup": cgroup,
+            "nofile": caps.get("nofile"),
+            "mem_mb": caps.get("mem_mb"),
+            "cpu_pct": caps.get("cpu_pct"),
+            # cgroup join child mein fail ho sakta hai -> rlimit fallback ke liye hamesha
+            "nproc": uid_tasks() + caps["nproc"] if caps.get("nproc") else None,
+        }
+
+    def preexec(self, caps, cgroup=None):
+        spec = self.spec(caps, cgroup)
+        return lambda: apply(spec)
+
+
+def apply(spec):
+    # child process mein, exec (ya runpy) se pehle; fork ke baad sirf simple syscalls
+    cgroup, mem, cpu = spec["cgroup"], spec["mem_mb"], spec["cpu_pct"]
+    joined = False
+    if cgroup:
+        try:
+            _write(f"{cgroup}/cgroup.procs", str(os.getpid()))
+            joined = True
+        except OSError:
+            pass  # bina cap ke na chale: neeche rlimit fallback
+    if spec["nofile"]:
+        _set(resource.RLIMIT_NOFILE, spec["nofile"])
+    if not joined:
+        if mem:
+            _set(resource.RLIMIT_DATA, mem * 1024 * 1024)
+        if spec["nproc"]:
+            _set(resource.RLIMIT_NPROC, spec["nproc"])
+        if cpu and cpu < 100:
+            os.nice(10)  # rlimit mein CPU % cap nahi hota; kam priority best effort
+
+
+def _set(res, value):
+    soft, hard = resource.getrlimit(res)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    try:
+        resource.setrlimit(res, (value, value))
+    except (ValueError, OSError):
+        pass
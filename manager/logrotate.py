@@ -0,0 +1,220 @@
+import os
+import re
+import glob
+import gzip
+import time
+import asyncio
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ================= LOG ROTATION + ARCHIVAL =================
+# Bots apni log file O_APPEND mein likhte hain, isliye copytruncate: file ko
+# compressed segment (<name>.log.<YYYYmmdd-HHMMSS>.gz/.zst) mein copy karo, phir
+# truncate. Size ya age limit cross hote hi rotate; purane segments policy ke
+# hisaab se (keep count + max age) delete.
+
+ARCHIVE_RE = re.compile(r"\.(\d{8}-\d{6})(?:-(\d+))?\.(gz|zst|raw)$")
+
+
+def default_compression():
+    return "zstd" if zstandard else "gzip"
+
+
+def archives(path):
+    """Rotated segments, newest first."""
+    found = []
+    for p in glob.glob(glob.escape(path) + ".*"):
+        m = ARCHIVE_RE.fullmatch(p[len(path):])
+        if m:
+            found.append((m.group(1), int(m.group(2) or 1), p))
+    return [p for _, _, p in sorted(found, reverse=True)]
+
+
+_sizes = {}  # archive path -> (mtime_ns, uncompressed size); streamed zstd ko baar baar na gino
+
+
+def _remember_size(path, size):
+    if len(_sizes) > 4096:
+        _sizes.clear()
+    _sizes[path] = (os.stat(path).st_mtime_ns, size)
+
+
+def segment_size(path):
+    # Poora decompress kiye bina uncompressed size
+    cached = _sizes.get(path)
+    if cached and cached[0] == os.stat(path).st_mtime_ns:
+        return cached[1]
+    if path.endswith(".gz"):
+        with open(path, "rb") as f:
+            f.seek(-4, os.SEEK_END)
+            return int.from_bytes(f.read(4), "little")  # ISIZE (mod 2^32, segments chhote hain)
+    if path.endswith(".zst"):
+        if zstandard is None:
+            return 0  # zstandard install nahi -> padh hi nahi sakte
+        with open(path, "rb") as f:
+            size = zstandard.frame_content_size(f.read(18))
+        if size >= 0:
+            return size
+        size = 0  # header mein size nahi (rotate ka delta): ek baar stream karke gino
+        with open_segment(path) as f:
+            while True:
+                buf = f.read(1024 * 1024)
+                if not buf:
+                    break
+                size += len(buf)
+        _remember_size(path, size)
+        return size
+    return os.path.getsize(path)
+
+
+def open_segment(path):
+    """Binary file-like; compressed segments pe forward seek streaming decompress karta hai."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        f = open(path, "rb")
+        return zstandard.ZstdDecompressor().stream_reader(f, closefd=True)
+    return open(path, "rb")
+
+
+class _Segment:
+    """Archive ka compressed stream jo rotate ke dauran khula rehta hai (delta baad mein bhi likh sakein)."""
+
+    def __init__(self, dst, method):
+        self.dst = dst
+        self.tmp = dst + ".tmp"
+        self.raw = open(self.tmp, "wb")
+        if method == "zstd" and zstandard:
+            # content size header mein nahi (delta pehle se pata nahi); segment_size fallback karta hai
+            self.out = zstandard.ZstdCompressor(level=3).stream_writer(self.raw, closefd=False)
+        elif method == "gzip":
+            self.out = gzip.GzipFile(fileobj=self.raw, mode="wb", compresslevel=6)
+        else:
+            self.out = self.raw
+
+    def close(self):
+        if self.out is not self.raw:
+            self.out.close()
+        self.raw.close()
+        os.replace(self.tmp, self.dst)
+
+    def abort(self):
+        self.raw.close()
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
+
+
+def _copy_n(fin, fout, n):
+    while n > 0:
+        buf = fin.read(min(1024 * 1024, n))
+        if not buf:
+            break
+        fout.write(buf)
+        n -= len(buf)
+
+
+class LogRotator:
+    def __init__(self, log_dir, policy_for, compression=None, interval=60, before_truncate=None, on_truncate=None):
+        self.log_dir = log_dir
+        self.policy_for = policy_for
+        compression = compression or default_compression()
+        if compression == "zstd" and not zstandard:
+            compression = "gzip"  # .zst naam ke neeche raw stream na likhe
+        self.compression = compression
+        self.interval = interval
+        self.before_truncate = before_truncate  # async (path): truncate se pehle bacha output bhejo
+        self.on_truncate = on_truncate  # sync (path, end): [offset, end) archive mein gaya, ab truncate
+        self.started = {}
+
+    def _segment_started(self, path):
+        if path not in self.started:
+            arch = archives(path)
+            self.started[path] = os.path.getmtime(arch[0]) if arch else time.time()
+        return self.started[path]
+
+    def archive_name(self, path):
+        ext = {"zstd": ".zst", "gzip": ".gz"}.get(self.compression, ".raw")
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        name = f"{path}.{stamp}{ext}"
+        n = 1
+        while os.path.exists(name):
+            n += 1
+            name = f"{path}.{stamp}-{n}{ext}"
+        return name
+
+    def due(self, path, policy):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return False
+        if size == 0:
+            return False
+        if size >= policy["log_max_mb"] * 1024 * 1024:
+            return True
+        return time.time() - self._segment_started(path) >= policy["log_max_age_h"] * 3600
+
+    async def rotate(self, path):
+        # Shipper flush pehle (outbox rate limit = seconds lag sakte hain), snapshot
+        # uske baad: is await ke dauran likha output bhi archive mein jaayega
+        if self.before_truncate:
+            await self.before_truncate(path)
+        seg = _Segment(self.archive_name(path), self.compression)
+        try:
+            with open(path, "rb") as fin:
+                size = os.fstat(fin.fileno()).st_size
+                await asyncio.to_thread(_copy_n, fin, seg.out, size)
+                # compress ke dauran bot ne jo likha (delta) + truncate, beech mein koi await
+                # nahi. copytruncate: bot ka fd O_APPEND hai, agla write offset 0 se shuru hoga
+                delta = fin.read()
+                seg.out.write(delta)
+                end = size + len(delta)
+                if self.on_truncate:
+                    try:
+                        self.on_truncate(path, end)
+                    except Exception as e:
+                        print(f"Log rotate on_truncate failed for {path}: {e}")
+                with open(path, "r+b") as f:
+                    f.truncate(0)
+        except BaseException:
+            seg.abort()
+            raise
+        await asyncio.to_thread(seg.close)
+        _remember_size(seg.dst, end)
+        self.started[path] = time.time()
+        return seg.dst
+
+    def prune(self, path, policy):
+        removed = []
+        cutoff = time.time() - policy["log_retention_days"] * 86400
+        for i, seg in enumerate(archives(path)):
+            if i >= policy["log_keep"] or os.path.getmtime(seg) < cutoff:
+                os.remove(seg)
+                removed.append(seg)
+        return removed
+
+    async def sweep(self):
+        for path in glob.glob(os.path.join(glob.escape(self.log_dir), "**", "*.log"), recursive=True):
+            policy = self.policy_for(path)
+            try:
+                if self.due(path, policy):
+                    await self.rotate(path)
+                await asyncio.to_thread(self.prune, path, policy)
+            except OSError as e:
+                print(f"Log rotate failed for {path}: {e}")
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"Log rotator error: {e}")
+
+
+def remove_all(path):
+    for p in [path] + archives(path):
+        if os.path.exists(p):
+            os.remove(p)
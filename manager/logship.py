@@ -0,0 +1,275 @@
+import os
+import time
+import asyncio
+
+from manager.outbox import LOGS
+
+# ================= LOG MULTIPLEXER =================
+# Saare running bots ke liye ek hi task: har poll pe sirf os.stat() (offsets yaad
+# rehte hain), aur flush interval pe har chat ka naya output ek saath bheja jaata
+# hai. Kuch drop nahi hota: chhota output -> message(s), bada -> document, aur
+# offset send successful hone ke baad hi aage badhta hai (fail = agli baar dobara).
+# Rate limiting outbox karta hai (LOGS priority, user notices ke baad).
+
+TEXT_LIMIT = 3500
+MAX_MESSAGES = 3
+MAX_DOC_BYTES = 20 * 1024 * 1024
+MAX_FAILURES = 3  # closing bot ka output itni baar fail -> chhod do (chat ne bot block kiya etc.)
+
+
+def _escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _read_range(path, start, end):
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+def split_html(text, limit=TEXT_LIMIT):
+    # Escaped text ko line boundaries pe todo; "&amp;" jaisi entity beech se na kate
+    parts = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+            amp = text.rfind("&", cut - 5, cut)
+            if amp > 0 and text.find(";", amp) >= cut:
+                cut = amp
+        parts.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text:
+        parts.append(text)
+    return parts
+
+
+class Tracked:
+    __slots__ = ("bot", "label", "path", "chat_id", "offset", "size", "closing", "failures",
+                 "carry", "carry_from", "carry_skipped", "gen")
+
+    def __init__(self, bot, path, chat_id, offset, label=None):
+        self.bot = bot
+        self.label = label or bot
+        self.path = path
+        self.chat_id = chat_id
+        self.offset = offset
+        self.size = offset
+        self.closing = False
+        self.failures = 0
+        self.carry = b""  # rotation truncate se pehle ka unshipped output
+        self.carry_from = 0  # carry[0] ka purani file mein offset
+        self.carry_skipped = 0
+        self.gen = 0  # har truncate pe +1 (in-flight flush ko pata chale)
+
+
+class LogShipper:
+    def __init__(self, flush_interval=1800, poll_interval=5, max_pending=256 * 1024):
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        self.max_pending = max_pending
+        self.tracked = {}
+        self.last_flush = {}
+        self.bot = None
+        self.outbox = None
+        self._task = None
+
+    def start(self, bot, outbox):
+        self.bot = bot
+        self.outbox = outbox
+        if not self._task:
+            self._task = asyncio.create_task(self.run())
+
+    def track(self, bot, path, chat_id, label=None):
+        try:
+            offset = os.path.getsize(path)
+        except OSError:
+            offset = 0
+        old = self.tracked.get(bot)
+        if old and old.path == path:
+            offset = old.offset  # restart: jo ship nahi hua woh bhi jaayega
+        self.tracked[bot] = Tracked(bot, path, chat_id, offset, label)
+        self.last_flush.setdefault(chat_id, time.monotonic())
+
+    def untrack(self, bot):
+        t = self.tracked.get(bot)
+        if t:
+            t.closing = True  # agle flush mein bacha hua output bhej ke hata denge
+
+    def forget(self, bot):
+        self.tracked.pop(bot, None)
+
+    async def flush_path(self, path):
+        # Rotation truncate se pehle: is file ka bacha hua output abhi bhej do
+        for t in list(self.tracked.values()):
+            if t.path != path:
+                continue
+            try:
+                t.size = os.stat(path).st_size
+            except OSError:
+                continue
+            if t.size > t.offset:
+                await self.flush(t.chat_id, [t])
+
+    def on_truncate(self, path, end):
+        # Rotation ka sync hook, truncate se theek pehle (koi await nahi): flush_path ke
+        # baad likha gaya [offset, end) abhi padh ke carry mein rakho, agli flush bhejegi
+        for t in self.tracked.values():
+            if t.path != path:
+                continue
+            if t.offset < end:
+                start = max(t.offset, end - self.max_pending)
+                if not t.carry:
+                    t.carry_from = start
+                t.carry_skipped += start - t.offset
+                t.carry += _read_range(path, start, end)
+                if len(t.carry) > self.max_pending:
+                    cut = len(t.carry) - self.max_pending
+                    t.carry_skipped += cut
+                    t.carry = t.carry[cut:]
+                    t.carry_from += cut
+            t.offset = t.size = 0
+            t.gen += 1
+
+    def pending(self, chat_id=None):
+        return sum(t.size - t.offset + len(t.carry) for t in self.tracked.values()
+                   if chat_id is None or t.chat_id == chat_id)
+
+    def _poll(self):
+        per_chat = {}
+        for t in self.tracked.values():
+            try:
+                size = os.stat(t.path).st_size
+            except OSError:
+                size = 0
+            if size < t.offset:
+                t.offset = 0  # truncate/rotate hua
+            t.size = size
+            if size > t.offset or t.carry or t.closing:
+                per_chat.setdefault(t.chat_id, []).append(t)
+        return per_chat
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.tick()
+            except Exception as e:
+                print(f"Log shipper error: {e}")
+
+    async def tick(self, force=False):
+        now = time.monotonic()
+        for chat_id, items in self._poll().items():
+            due = now - self.last_flush.get(chat_id, now) >= self.flush_interval
+            big = sum(t.size - t.offset + len(t.carry) for t in items) >= self.max_pending
+            closing = any(t.closing for t in items)
+            if any(t.failures for t in items) and not (force or due):
+                continue  # pichla send fail hua: har poll pe retry nahi, agle interval pe
+            if force or due or big or closing:
+                self.last_flush[chat_id] = now
+                await self.flush(chat_id, items)
+        for bot, t in list(self.tracked.items()):
+            if t.closing and (t.offset >= t.size and not t.carry or t.failures >= MAX_FAILURES):
+                if t.offset < t.size or t.carry:
+                    print(f"Log ship for {bot} dropped after {t.failures} failures")
+                del self.tracked[bot]
+
+    @staticmethod
+    def _commit(t, snap, ok):
+        # snap = (gen, carry, carry_skipped, file_end) jo is flush ne uthaya tha
+        gen, carry, carry_skipped, file_end = snap
+        if not ok:
+            t.carry = carry + t.carry  # carry wapas; file range offset se dobara padhi jaayegi
+            t.carry_skipped += carry_skipped
+            t.failures += 1
+            return
+        t.failures = 0
+        if t.gen == gen:
+            t.offset = file_end
+        elif t.carry:
+            # send ke dauran rotate hua: on_truncate ne [purana offset, end) carry mein
+            # daala, usme se jo abhi bhej diya woh hata do
+            sent = max(0, file_end - t.carry_from)
+            t.carry = t.carry[sent:]
+            t.carry_from += sent
+
+    async def flush(self, chat_id, items):
+        chunks = []
+        for t in items:
+            gen, end = t.gen, t.size
+            start = max(t.offset, end - MAX_DOC_BYTES)
+            data = await asyncio.to_thread(_read_range, t.path, start, end) if end > start else b""
+            # carry is flush ka; fail hua to _commit wapas rakhega
+            snap = (gen, t.carry, t.carry_skipped, start + len(data))
+            skipped = start - t.offset + t.carry_skipped
+            text = (t.carry + data).decode(errors="ignore")
+            t.carry, t.carry_skipped = b"", 0
+            if text.strip():
+                chunks.append((t, snap, text, skipped))
+            else:
+                self._commit(t, snap, True)
+        # Chhote blocks ek message mein pack (headers bhi budget mein, bahut saare bots
+        # = 4096 se upar na jaaye); bade -> per-bot parts / document. Offset sirf
+        # successful send ke baad aage; pehla fail = baaki sab agli flush mein dobara.
+        batch, size = [], 0
+        sends = []
+        for t, snap, text, skipped in chunks:
+            block = f"📜 <b>Auto Logs — {t.label}</b>\n<pre>{_escape(text.strip())}</pre>"
+            if skipped or len(block) > TEXT_LIMIT:
+                sends.append(([(t, snap)], (t.label, text, skipped)))
+                continue
+            if batch and size + 1 + len(block) > TEXT_LIMIT:
+                sends.append((batch, "\n".join(b for _, _, b in batch)))
+                batch, size = [], 0
+            batch.append((t, snap, block))
+            size += len(block) + (1 if size else 0)
+        if batch:
+            sends.append((batch, "\n".join(b for _, _, b in batch)))
+
+        for i, (owners, send) in enumerate(sends):
+            if isinstance(send, str):
+                ok = await self._send_text(chat_id, send)
+            else:
+                ok = await self._send_big(chat_id, *send)
+            if not ok:
+                for pending, _ in sends[i:]:
+                    for t, snap, *_ in pending:
+                        self._commit(t, snap, False)
+                return
+            for t, snap, *_ in owners:
+                self._commit(t, snap, True)
+
+    async def _send_big(self, chat_id, bot, text, skipped):
+        header = f"📜 <b>Auto Logs — {bot}</b> (99/99)\n<pre></pre>"
+        parts = split_html(_escape(text.strip()), TEXT_LIMIT - len(header))
+        if len(parts) <= MAX_MESSAGES and not skipped:
+            for i, part in enumerate(parts, 1):
+                ok = await self._send_text(
+                    chat_id, f"📜 <b>Auto Logs — {bot}</b> ({i}/{len(parts)})\n<pre>{part}</pre>"
+                )
+                if not ok:
+                    return False
+            return True
+        note = f"\n⚠️ {skipped // 1024} KB purana output skip hua (20 MB cap)" if skipped else ""
+        return await self._send_document(
+            chat_id, text.encode(), f"{bot}-{int(time.time())}.log",
+            f"📜 <b>Auto Logs — {bot}</b> ({len(text) // 1024} KB){note}",
+        )
+
+    async def _send_text(self, chat_id, text):
+        try:
+            await self.outbox.request(chat_id, self.bot.send_message, chat_id, text,
+                                      parse_mode="HTML", priority=LOGS)
+            return True
+        except Exception as e:
+            print(f"Log ship to {chat_id} failed: {e}")
+            return False
+
+    async def _send_document(self, chat_id, data, filename, caption):
+        try:
+            await self.outbox.request(chat_id, self.bot.send_document, chat_id, document=data,
+                                      filename=filename, caption=caption, parse_mode="HTML", priority=LOGS)
+            return True
+        except Exception as e:
+            print(f"Log ship to {chat_id} failed: {e}")
+            return False
@@ -0,0 +1,164 @@
+import os
+from collections import deque
+
+from manager.logrotate import archives, open_segment, segment_size
+
+# ================= TAIL-SEEK LOG VIEWER =================
+# Log file kabhi poori memory mein nahi aati: page = end offset se peeche
+# ek fixed byte window; grep = end se reverse block reader. Memory aur latency
+# file size se independent rehti hai (grep ke liye scan budget fixed hai).
+# Rotated (compressed) segments bhi padhe jaate hain: sirf wahi ek segment
+# stream-decompress hota hai jiska page chahiye.
+
+PAGE_BYTES = 3500
+BLOCK = 64 * 1024
+MAX_LINE = 1024 * 1024
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def log_segments(path):
+    """[live file, newest archive, ..., oldest archive]"""
+    return [path] + archives(path)
+
+
+def seg_size(path):
+    return file_size(path) if path.endswith(".log") else segment_size(path)
+
+
+def read_page(path, end=None, size=PAGE_BYTES):
+    """[start, end) window jo line boundary pe shuru ho. Returns (text, start, end)."""
+    total = seg_size(path)
+    if end is None or end > total:
+        end = total
+    start = max(0, end - size)
+    if end <= 0:
+        return "", 0, 0
+    with open_segment(path) as f:
+        f.seek(start)
+        buf = f.read(end - start)
+    if start > 0:
+        # pehli adhoori line chhod do (agar poora window ek hi line nahi hai)
+        nl = buf.find(b"\n")
+        if 0 <= nl < len(buf) - 1:
+            buf = buf[nl + 1:]
+            start += nl + 1
+    return buf.decode(errors="ignore"), start, end
+
+
+def iter_chunks_reverse(path, end=None, block=BLOCK, budget=None):
+    """End se peeche (offset, chunk) yield karta hai; har chunk line boundary pe shuru hota hai."""
+    total = file_size(path)
+    pos = total if end is None else min(end, total)
+    scanned = 0
+    tail = b""
+    with open(path, "rb") as f:
+        while pos > 0:
+            if budget is not None and scanned >= budget:
+                return
+            step = min(block, pos)
+            pos -= step
+            scanned += step
+            f.seek(pos)
+            buf = f.read(step) + tail
+            nl = buf.find(b"\n")
+            if pos == 0 or nl < 0 and len(buf) > MAX_LINE:
+                # file ki shuruaat, ya newline-less binary kachra: memory bounded rakho
+                tail = b""
+                yield pos, buf
+            elif nl < 0:
+                tail = buf
+            else:
+                # pehli adhoori line agle (pichhle) block ke saath judegi
+                tail = buf[:nl]
+                yield pos + nl + 1, buf[nl + 1:]
+
+
+def iter_lines_reverse(path, end=None, block=BLOCK, budget=None):
+    """End se peeche ki taraf (offset, line) yield karta hai, budget bytes tak."""
+    for start, chunk in iter_chunks_reverse(path, end, block, budget):
+        lines = chunk.split(b"\n")
+        offset = start + len(chunk)
+        for line in reversed(lines):
+            offset -= len(line)
+            yield offset, line
+            offset -= 1
+
+
+def grep(path, needle, end=None, limit=30, budget=64 * 1024 * 1024):
+    """Case-insensitive substring search, newest first. Returns (matches, resume_offset)."""
+    needle_b = needle.lower().encode()
+    matches = []
+    resume = 0
+    for start, chunk in iter_chunks_reverse(path, end, budget=budget):
+        resume = start
+        low = chunk.lower()
+        if needle_b not in low:
+            continue  # poore chunk mein match nahi -> lines split hi mat karo
+        offset = start + len(chunk)
+        for line in reversed(low.split(b"\n")):
+            offset -= len(line)
+            if needle_b in line:
+                matches.append((offset, chunk[offset - start:offset - start + len(line)].decode(errors="ignore")))
+                if len(matches) >= limit:
+                    matches.reverse()
+                    return matches, offset
+            offset -= 1
+    matches.reverse()
+    return matches, resume
+
+
+def grep_forward(path, needle_b, limit, budget=None, block=1024 * 1024):
+    """Compressed segment ko shuru se stream karo (budget bytes tak), aakhri `limit`
+    matches rakho. Returns (matches, scanned_bytes)."""
+    found = deque(maxlen=limit)
+    offset = 0
+    scanned = 0
+    tail = b""
+    with open_segment(path) as f:
+        while budget is None or scanned < budget:
+            buf = f.read(block if budget is None else min(block, budget - scanned))
+            scanned += len(buf)
+            if not buf:
+                break
+            buf = tail + buf
+            cut = buf.rfind(b"\n") + 1
+            if cut == 0 and len(buf) <= MAX_LINE:
+                tail = buf
+                continue
+            if cut == 0:
+                cut = len(buf)
+            chunk, tail = buf[:cut], buf[cut:]
+            low = chunk.lower()
+            if needle_b in low:
+                pos = 0
+                for line in low.split(b"\n"):
+                    if needle_b in line:
+                        found.append((offset + pos, chunk[pos:pos + len(line)].decode(errors="ignore")))
+                    pos += len(line) + 1
+            offset += len(chunk)
+    if tail and needle_b in tail.lower():
+        found.append((offset, tail.decode(errors="ignore")))
+    return list(found), scanned
+
+
+def grep_all(path, needle, limit=30, budget=64 * 1024 * 1024):
+    """Live file + rotated segments, newest first; total scan budget ke andar."""
+    matches = []
+    for i, seg in enumerate(log_segments(path)):
+        if budget <= 0 or len(matches) >= limit:
+            break
+        if i == 0:
+            end = file_size(seg)
+            found, resume = grep(seg, needle, end=end, limit=limit, budget=budget)
+            budget -= end - resume
+        else:
+            found, scanned = grep_forward(seg, needle.lower().encode(), limit - len(matches), budget)
+            budget -= scanned
+        matches = found[-(limit - len(matches)):] + matches if found else matches
+    return matches
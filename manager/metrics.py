@@ -0,0 +1,176 @@
+import time
+import asyncio
+import bisect
+from contextlib import contextmanager
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+# ================= METRICS =================
+# Chhota Prometheus text-format registry (prometheus_client dependency nahi):
+# Counter, Gauge (callback se bhi), Histogram. METRICS_ADDR set ho to aiohttp
+# server /metrics pe export karta hai.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    parts = []
+    for n, v in zip(names, values):
+        v = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{n}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _fmt(v):
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+
+    def _key(self, labels):
+        return tuple(labels.get(n, "") for n in self.labels)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self):
+        lines = self.header()
+        for key, v in self.values.items():
+            lines.append(f"{self.name}{_labels(self.labels, key)} {_fmt(v)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, n=1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + n
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=(), collect=None):
+        super().__init__(name, help, labels)
+        self.collect = collect  # () -> {label tuple: value}, scrape ke waqt
+
+    def set(self, value, **labels):
+        self.values[self._key(labels)] = value
+
+    def render(self):
+        if self.collect:
+            try:
+                self.values = dict(self.collect())
+            except Exception as e:
+                print(f"Metric {self.name} collect failed: {e}")
+        return super().render()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        h = self.values.get(key)
+        if h is None:
+            h = self.values[key] = [[0] * len(self.buckets), 0, 0.0]
+        i = bisect.bisect_left(self.buckets, value)
+        if i < len(self.buckets):
+            h[0][i] += 1
+        h[1] += 1
+        h[2] += value
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self):
+        lines = self.header()
+        names = self.labels + ("le",)
+        for key, (counts, total, s) in self.values.items():
+            acc = 0
+            for b, c in zip(self.buckets, counts):
+                acc += c
+                lines.append(f"{self.name}_bucket{_labels(names, key + (_fmt(b),))} {acc}")
+            lines.append(f"{self.name}_bucket{_labels(names, key + ('+Inf',))} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_fmt(s)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def _add(self, m):
+        self.metrics.append(m)
+        return m
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=(), collect=None):
+        return self._add(Gauge(name, help, labels, collect))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def render(self):
+        lines = []
+        for m in self.metrics:
+            lines += m.render()
+        return "\n".join(lines) + "\n"
+
+
+async def watch_loop_lag(hist, gauge, interval=0.5):
+    # Sleep jitna late jaage = event loop kitna block tha
+    loop = asyncio.get_running_loop()
+    while True:
+        t0 = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - t0 - interval)
+        hist.observe(lag)
+        gauge.set(lag)
+
+
+async def serve(registry, addr):
+    """addr = "host:port". aiohttp na ho to None."""
+    if web is None:
+        print("⚠️ METRICS_ADDR set hai par aiohttp installed nahi; metrics endpoint band.")
+        return None
+    host, _, port = addr.rpartition(":")
+
+    async def handle(request):
+        return web.Response(body=registry.render().encode(),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host or "127.0.0.1", int(port))
+    await site.start()
+    return runner
@@ -0,0 +1,247 @@
+import time
+import heapq
+import asyncio
+import itertools
+from collections import deque
+
+from manager.ratelimit import TokenBucket
+
+# ================= OUTBOUND DISPATCHER =================
+# Saare proactive Telegram sends ek queue se: global + per-chat token buckets,
+# priority (user ko jaane wale messages pehle, audit sabse baad), 429 pe
+# RetryAfter jitna us chat ko pause karke retry. Ek chat ka ek hi send in-flight
+# rehta hai, isliye order bana rehta hai. Audit lines digest mein coalesce hoti hain.
+
+REPLY, LOGS, AUDIT = 0, 1, 2
+PRIORITY_NAMES = {REPLY: "reply", LOGS: "logs", AUDIT: "audit"}
+DIGEST_LIMIT = 3500
+
+
+class Outgoing:
+    __slots__ = ("priority", "seq", "chat_id", "method", "args", "kwargs", "key",
+                 "future", "queued", "attempts")
+
+    def __init__(self, priority, seq, chat_id, method, args, kwargs, key):
+        self.priority = priority
+        self.seq = seq
+        self.chat_id = chat_id
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.key = key
+        self.future = asyncio.get_running_loop().create_future()
+        self.queued = time.monotonic()
+        self.attempts = 0
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+def _retry_after(e):
+    # telegram.error.RetryAfter: int seconds (PTB 20) ya timedelta (naye versions)
+    ra = getattr(e, "retry_after", None)
+    if ra is None:
+        return None
+    return ra.total_seconds() if hasattr(ra, "total_seconds") else float(ra)
+
+
+def _transient(e):
+    # BadRequest/Forbidden bhi NetworkError ke subclass hain -> exact naam match
+    return type(e).__name__ in ("TimedOut", "NetworkError")
+
+
+class Outbox:
+    def __init__(self, global_rate=25, private_rate=1.0, group_rate=20 / 60,
+                 digest_interval=10, max_inflight=8, max_attempts=5):
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+        self.digest_interval = digest_interval
+        self.max_inflight = max_inflight
+        self.max_attempts = max_attempts
+        self.bucket = TokenBucket(global_rate)
+        self.chat_buckets = {}
+        self.bot = None
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.latency = deque(maxlen=1000)
+        self._heap = []
+        self._seq = itertools.count()
+        self._keys = {}
+        self._inflight = set()
+        self._paused = {}
+        self._digests = {}
+        self._wake = None
+        self._tasks = []
+
+    def start(self, bot):
+        self.bot = bot
+        if self._tasks:
+            return
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run()), asyncio.create_task(self._digest_loop())]
+
+    # ---------- enqueue ----------
+    def submit(self, chat_id, method, /, *args, priority=REPLY, key=None, **kwargs):
+        """Queue karo, future lautao. key: same key ka pending item naye args se replace.
+
+        chat_id/method positional-only: edit_message_text(chat_id=...) jaise kwargs seedhe method ko jaate hain.
+        """
+        if key is not None:
+            old = self._keys.get(key)
+            if old is not None and not old.future.done() and old.attempts == 0:
+                old.args, old.kwargs = args, kwargs
+                return old.future
+        item = Outgoing(priority, next(self._seq), chat_id, method, args, kwargs, key)
+        if key is not None:
+            self._keys[key] = item
+        heapq.heappush(self._heap, item)
+        if self._wake:
+            self._wake.set()
+        return item.future
+
+    async def request(self, chat_id, method, /, *args, priority=REPLY, key=None, **kwargs):
+        return await self.submit(chat_id, method, *args, priority=priority, key=key, **kwargs)
+
+    def fire(self, chat_id, method, /, *args, priority=REPLY, key=None, **kwargs):
+        """Fire-and-forget submit: failure sirf print hoti hai."""
+        fut = self.submit(chat_id, method, *args, priority=priority, key=key, **kwargs)
+        fut.add_done_callback(_consume)
+        return fut
+
+    def send(self, chat_id, text, priority=REPLY, key=None, **kwargs):
+        kwargs.setdefault("parse_mode", "HTML")
+        return self.fire(chat_id, self.bot.send_message, chat_id, text, priority=priority, key=key, **kwargs)
+
+    def audit(self, chat_id, line):
+        """Audit event: agle digest mein ek line; alag message nahi."""
+        self._digests.setdefault(chat_id, []).append(line)
+        if sum(len(x) + 1 for x in self._digests[chat_id]) >= DIGEST_LIMIT:
+            self._flush_digest(chat_id)
+
+    def _flush_digest(self, chat_id):
+        lines = self._digests.pop(chat_id, None)
+        if not lines:
+            return
+        body, parts = [], []
+        for line in lines:
+            if body and sum(len(x) + 1 for x in body) + len(line) > DIGEST_LIMIT:
+                parts.append(body)
+                body = []
+            body.append(line[:DIGEST_LIMIT])
+        parts.append(body)
+        for body in parts:
+            head = f"🧾 <b>Audit</b> ({len(body)} events)\n" if len(body) > 1 else ""
+            self.send(chat_id, head + "\n".join(body), priority=AUDIT)
+
+    async def _digest_loop(self):
+        while True:
+            await asyncio.sleep(self.digest_interval)
+            for chat_id in list(self._digests):
+                self._flush_digest(chat_id)
+
+    # ---------- dispatch ----------
+    def _chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            group = isinstance(chat_id, int) and chat_id < 0
+            rate = self.group_rate if group else self.private_rate
+            bucket = self.chat_buckets[chat_id] = TokenBucket(rate, 1)
+        return bucket
+
+    def _next_ready(self):
+        """Sabse high priority item jiska chat free hai; warna (None, kitna wait)."""
+        now = time.monotonic()
+        skipped, wait, found = [], None, None
+        while self._heap:
+            item = heapq.heappop(self._heap)
+            if item.future.done():
+                continue
+            chat = item.chat_id
+            delay = max(self._paused.get(chat, 0) - now, self._chat_bucket(chat).delay())
+            if chat in self._inflight or delay > 0:
+                skipped.append(item)
+                if chat not in self._inflight:
+                    wait = delay if wait is None else min(wait, delay)
+                continue
+            found = item
+            break
+        for item in skipped:
+            heapq.heappush(self._heap, item)
+        return found, wait
+
+    async def _run(self):
+        sem = asyncio.Semaphore(self.max_inflight)
+        while True:
+            item, wait = self._next_ready()
+            if item is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.bucket.acquire()
+            await sem.acquire()
+            self._chat_bucket(item.chat_id).take()
+            self._inflight.add(item.chat_id)
+            asyncio.create_task(self._deliver(item, sem))
+
+    async def _deliver(self, item, sem):
+        item.attempts += 1
+        requeue = False
+        try:
+            result = await item.method(*item.args, **item.kwargs)
+        except Exception as e:
+            ra = _retry_after(e)
+            if item.attempts < self.max_attempts and (ra is not None or _transient(e)):
+                self.retried += 1
+                pause = ra + 0.5 if ra is not None else 2 ** item.attempts
+                self._paused[item.chat_id] = time.monotonic() + pause
+                requeue = True
+            else:
+                self.failed += 1
+                item.future.set_exception(e)
+        else:
+            self.sent += 1
+            self.latency.append(time.monotonic() - item.queued)
+            item.future.set_result(result)
+        finally:
+            self._inflight.discard(item.chat_id)
+            sem.release()
+            if requeue:
+                heapq.heappush(self._heap, item)
+            elif self._keys.get(item.key) is item:
+                del self._keys[item.key]
+            self._wake.set()
+
+    # ---------- metrics ----------
+    def depth(self):
+        counts = {name: 0 for name in PRIORITY_NAMES.values()}
+        for item in self._heap:
+            if not item.future.done():
+                counts[PRIORITY_NAMES[item.priority]] += 1
+        counts["digest"] = sum(len(v) for v in self._digests.values())
+        return counts
+
+    def stats(self):
+        lat = sorted(self.latency)
+
+        def pct(p):
+            return lat[min(len(lat) - 1, int(len(lat) * p))] if lat else 0.0
+
+        return {
+            "depth": self.depth(),
+            "inflight": len(self._inflight),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "latency_p50": pct(0.50),
+            "latency_p99": pct(0.99),
+        }
+
+
+def _consume(fut):
+    # fire-and-forget sends: fail hone pe log, "exception never retrieved" nahi
+    if not fut.cancelled() and fut.exception():
+        print(f"Outbox send failed: {fut.exception()}")
@@ -0,0 +1,107 @@
+import os
+import time
+import asyncio
+
+# ================= /proc SAMPLER =================
+# Har pid ka sirf ek /proc/<pid>/stat read: CPU ticks, threads, start time, RSS.
+# CPU% do samples ke delta se. Saikdon processes ke liye bhi har kuch seconds
+# pe sasta hai.
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def _boot_time():
+    try:
+        with open("/proc/stat", "r") as f:
+            for line in f:
+                if line.startswith("btime "):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+BOOT_TIME = _boot_time()
+
+
+def read_stat(pid):
+    """(cpu_ticks, threads, start_ticks, rss_bytes) ya None agar process nahi hai."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    # comm mein spaces/brackets ho sakte hain -> aakhri ')' ke baad split
+    fields = raw[raw.rfind(b")") + 2:].split()
+    # fields[0] = state (field 3); utime=14, stime=15, threads=20, starttime=22, rss=24
+    return (
+        int(fields[11]) + int(fields[12]),
+        int(fields[17]),
+        int(fields[19]),
+        int(fields[21]) * PAGE_SIZE,
+    )
+
+
+def start_time(pid):
+    """Zinda process ka start time (ticks since boot); dead/zombie pe None."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    fields = raw[raw.rfind(b")") + 2:].split()
+    return None if fields[0] in (b"Z", b"X") else int(fields[19])
+
+
+def started_at(pid):
+    """Process start ka epoch time (ya None)."""
+    st = read_stat(pid)
+    return BOOT_TIME + st[2] / CLK_TCK if st and BOOT_TIME else None
+
+
+class Sample:
+    __slots__ = ("cpu", "rss", "threads", "uptime")
+
+    def __init__(self, cpu, rss, threads, uptime):
+        self.cpu = cpu
+        self.rss = rss
+        self.threads = threads
+        self.uptime = uptime
+
+
+class ProcSampler:
+    def __init__(self):
+        self.samples = {}
+        self._prev = {}
+
+    def sample(self, targets):
+        """targets: {name: (pid, started)}; started = asli start epoch (warm handoff) ya
+        None = /proc start time. Returns/updates {name: Sample}."""
+        now_mono, now = time.monotonic(), time.time()
+        fresh, prev = {}, {}
+        for name, (pid, started) in targets.items():
+            st = read_stat(pid)
+            if st is None:
+                continue
+            ticks, threads, start, rss = st
+            cpu = 0.0
+            last = self._prev.get(name)
+            if last and last[0] == pid and last[1] == start and now_mono > last[3]:
+                cpu = (ticks - last[2]) / CLK_TCK / (now_mono - last[3]) * 100
+            prev[name] = (pid, start, ticks, now_mono)
+            if started is None and BOOT_TIME:
+                started = BOOT_TIME + start / CLK_TCK
+            uptime = now - started if started else 0
+            fresh[name] = Sample(cpu, rss, threads, max(0, uptime))
+        self._prev = prev
+        self.samples = fresh
+        return fresh
+
+    async def run(self, targets, interval=5):
+        while True:
+            try:
+                self.sample(targets())
+            except Exception as e:
+                print(f"Proc sampler error: {e}")
+            await asyncio.sleep(interval)
@@ -0,0 +1,65 @@
+import sys
+import time
+import asyncio
+import threading
+from collections import Counter
+
+# ================= SAMPLING PROFILER =================
+# Owner ke kehne pe N seconds: ek daemon thread har few ms event-loop thread ka
+# current stack (sys._current_frames) padhta hai. Tracing nahi, isliye overhead
+# kam. Output: top functions (self + total) aur flamegraph.pl ke liye collapsed stacks.
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.running = False
+
+    def _sample(self, target, stop, stacks):
+        while not stop.is_set():
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                stacks[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    async def run(self, seconds):
+        """Event loop thread ko profile karo; Profile lautata hai."""
+        if self.running:
+            raise RuntimeError("profiler already running")
+        self.running = True
+        stacks, stop = Counter(), threading.Event()
+        t = threading.Thread(target=self._sample, args=(threading.get_ident(), stop, stacks), daemon=True)
+        started = time.monotonic()
+        t.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stop.set()
+            await asyncio.to_thread(t.join)
+            self.running = False
+        return Profile(stacks, time.monotonic() - started)
+
+
+class Profile:
+    def __init__(self, stacks, duration):
+        self.stacks = stacks
+        self.duration = duration
+        self.samples = sum(stacks.values())
+
+    def top(self, n=15):
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for f in set(frames):
+                total[f] += count
+        return [(f, c, total[f]) for f, c in own.most_common(n)]
+
+    def collapsed(self):
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
@@ -0,0 +1,37 @@
+import time
+import asyncio
+
+# ================= TOKEN BUCKET =================
+# Telegram limits: ~30 msg/s global, ~1 msg/s per chat, ~20 msg/min per group.
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, n=1):
+        """Kitna wait karna padega n tokens ke liye (reserve nahi karta)."""
+        self._refill()
+        if self.tokens >= n:
+            return 0.0
+        return (n - self.tokens) / self.rate
+
+    def take(self, n=1):
+        self._refill()
+        self.tokens -= n
+
+    async def acquire(self, n=1):
+        while True:
+            wait = self.delay(n)
+            if wait <= 0:
+                self.take(n)
+                return
+            await asyncio.sleep(wait)
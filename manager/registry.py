@@ -0,0 +1,122 @@
+# ================= BOT REGISTRY =================
+# Har bot ki identity = (owner, file name) -> chhota numeric id (callback_data
+# 64 bytes mein fit). Indexes: id -> Bot, (owner, name) -> id, owner -> ids,
+# chat -> ids. Saare lookups O(1), list scans nahi.
+
+import fnmatch
+
+MAX_TAGS = 8
+MAX_TAG_LEN = 20
+
+
+class Bot:
+    __slots__ = ("id", "owner", "name", "chat", "tags")
+
+    def __init__(self, bid, owner, name, chat, tags=()):
+        self.id = bid
+        self.owner = owner
+        self.name = name
+        self.chat = chat
+        self.tags = set(tags)
+
+    def record(self):
+        rec = {"owner": self.owner, "name": self.name, "chat": self.chat}
+        if self.tags:
+            rec["tags"] = sorted(self.tags)
+        return rec
+
+
+class BotRegistry:
+    def __init__(self):
+        self.bots = {}
+        self.by_owner = {}
+        self.by_chat = {}
+        self._by_key = {}
+        self._next = 1
+
+    def load(self, table):
+        for bid, v in table.items():
+            self._index(Bot(bid, v["owner"], v["name"], v["chat"], v.get("tags", ())))
+
+    def _index(self, bot):
+        self.bots[bot.id] = bot
+        self._by_key[(bot.owner, bot.name)] = bot.id
+        self.by_owner.setdefault(bot.owner, set()).add(bot.id)
+        self.by_chat.setdefault(bot.chat, set()).add(bot.id)
+        if bot.id.isdigit():
+            self._next = max(self._next, int(bot.id) + 1)
+
+    def _unindex_chat(self, bot):
+        ids = self.by_chat.get(bot.chat)
+        if ids is not None:
+            ids.discard(bot.id)
+            if not ids:
+                del self.by_chat[bot.chat]
+
+    def register(self, owner, name, chat):
+        """(bot, changed): naya bot ya existing ka chat update; changed = persist karna hai."""
+        owner, chat = str(owner), str(chat)
+        bot = self.lookup(owner, name)
+        if bot:
+            if bot.chat == chat:
+                return bot, False
+            self._unindex_chat(bot)
+            bot.chat = chat
+            self.by_chat.setdefault(chat, set()).add(bot.id)
+            return bot, True
+        bot = Bot(str(self._next), owner, name, chat)
+        self._index(bot)
+        return bot, True
+
+    def remove(self, bid):
+        bot = self.bots.pop(bid, None)
+        if not bot:
+            return None
+        del self._by_key[(bot.owner, bot.name)]
+        ids = self.by_owner[bot.owner]
+        ids.discard(bid)
+        if not ids:
+            del self.by_owner[bot.owner]
+        self._unindex_chat(bot)
+        return bot
+
+    def get(self, bid):
+        return self.bots.get(bid)
+
+    def lookup(self, owner, name):
+        bid = self._by_key.get((str(owner), name))
+        return self.bots[bid] if bid else None
+
+    def owned(self, bid, user_id, admin=False):
+        """Bot sirf tab jab user uska owner hai (ya admin)."""
+        bot = self.bots.get(bid)
+        if bot and (admin or bot.owner == str(user_id)):
+            return bot
+        return None
+
+    def of_owner(self, owner):
+        return [self.bots[b] for b in self.by_owner.get(str(owner), ())]
+
+    def in_chat(self, chat):
+        return [self.bots[b] for b in self.by_chat.get(str(chat), ())]
+
+    # ---------- tags / bulk selection ----------
+    def set_tags(self, bid, tags):
+        """Tags replace karo; normalize (lowercase, '#' hata ke) karke lautao."""
+        bot = self.bots[bid]
+        clean = {t.lstrip("#").lower()[:MAX_TAG_LEN] for t in tags}
+        bot.tags = {t for t in clean if t}
+        if len(bot.tags) > MAX_TAGS:
+            bot.tags = set(sorted(bot.tags)[:MAX_TAGS])
+        return bot.tags
+
+    @staticmethod
+    def select(bots, selector):
+        """selector: "all"/"*", "#tag", ya file name glob ("weather_*")."""
+        selector = selector.strip()
+        if selector in ("all", "*"):
+            return list(bots)
+        if selector.startswith("#"):
+            tag = selector[1:].lower()
+            return [b for b in bots if tag in b.tags]
+        return [b for b in bots if fnmatch.fnmatchcase(b.name, selector)]
@@ -0,0 +1,251 @@
+import re
+import time
+import heapq
+import asyncio
+import itertools
+from collections import deque
+from datetime import datetime, timedelta
+
+# ================= SCHEDULER =================
+# Scripts jo hamesha chalne ki jagah cron / interval pe chalte hain: process sirf
+# run ke waqt, timeout pe kill, pichla run abhi chal raha ho to naya skip
+# (overlap nahi). Saare jobs ek hi timer heap (lazy deletion) + ek loop task se;
+# har job ka apna sleeping task nahi.
+
+ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+MIN_INTERVAL = 10
+HISTORY = 20
+FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _field(text, lo, hi):
+    values = set()
+    for part in text.split(","):
+        rng, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if rng == "*":
+            a, b = lo, hi
+        elif "-" in rng:
+            a, b = (int(x) for x in rng.split("-", 1))
+        else:
+            a = b = int(rng)
+            if step > 1:
+                b = hi  # "5/15" = 5 se shuru, har 15
+        if not (lo <= a <= b <= hi) or step < 1:
+            raise ValueError(f"'{part}' range {lo}-{hi} ke bahar")
+        values.update(range(a, b + 1, step))
+    return values
+
+
+class Cron:
+    """5-field cron (min hour dom month dow), local time. dom aur dow dono set = OR."""
+
+    def __init__(self, expr):
+        expr = ALIASES.get(expr.strip(), expr.strip())
+        parts = expr.split()
+        if len(parts) != 5:
+            raise ValueError("cron mein 5 fields chahiye: min hour day month weekday")
+        try:
+            self.minute, self.hour, self.dom, self.month, dow = (
+                _field(p, lo, hi) for p, (lo, hi) in zip(parts, FIELDS))
+        except ValueError as e:
+            raise ValueError(f"galat cron: {e}") from None
+        self.dow = {d % 7 for d in dow}  # 7 = Sunday
+        self.dom_any = parts[2] == "*"
+        self.dow_any = parts[4] == "*"
+        self.text = expr
+
+    def _day_ok(self, dt):
+        dom = dt.day in self.dom
+        dow = (dt.weekday() + 1) % 7 in self.dow
+        if self.dom_any or self.dow_any:
+            return dom and dow
+        return dom or dow
+
+    def next(self, after):
+        dt = datetime.fromtimestamp(after).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.month:
+                dt = (dt.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_ok(dt):
+                dt = (dt + timedelta(days=1)).replace(hour=0, minute=0)
+            elif dt.hour not in self.hour:
+                dt = (dt + timedelta(hours=1)).replace(minute=0)
+            elif dt.minute not in self.minute:
+                dt += timedelta(minutes=1)
+            else:
+                return dt.timestamp()
+        return None  # jaise "0 0 30 2 *" - kabhi nahi
+
+
+class Interval:
+    def __init__(self, seconds):
+        if seconds < MIN_INTERVAL:
+            raise ValueError(f"interval kam se kam {MIN_INTERVAL}s")
+        self.seconds = seconds
+        self.text = f"every {format_duration(seconds)}"
+
+    def next(self, after):
+        return after + self.seconds
+
+
+def parse_duration(text):
+    """"90s", "15m", "1h30m", "2d" -> seconds."""
+    parts = re.findall(r"(\d+)([smhd])", text.lower())
+    if not parts or "".join(n + u for n, u in parts) != text.lower():
+        raise ValueError(f"galat duration '{text}' (jaise 30s, 15m, 1h30m)")
+    return sum(int(n) * UNITS[u] for n, u in parts)
+
+
+def format_duration(seconds):
+    out = ""
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60), ("s", 1)):
+        if seconds >= size:
+            out += f"{int(seconds // size)}{unit}"
+            seconds %= size
+    return out or "0s"
+
+
+def parse_schedule(text):
+    """"every 15m" / "@every 15m" -> Interval; "@daily" / 5-field cron -> Cron."""
+    text = text.strip()
+    for prefix in ("every ", "@every "):
+        if text.lower().startswith(prefix):
+            return Interval(parse_duration(text[len(prefix):].strip()))
+    return Cron(text)
+
+
+class Run:
+    __slots__ = ("started", "duration", "result")
+
+    def __init__(self, started, duration, result):
+        self.started = started
+        self.duration = duration
+        self.result = result  # "ok", "exit N", "timeout", "skipped", "error: ..."
+
+    def encode(self):
+        return [int(self.started), round(self.duration, 2), self.result]
+
+
+class ScheduledJob:
+    __slots__ = ("id", "bot", "schedule", "timeout", "next_run", "running", "history")
+
+    def __init__(self, jid, bot, spec, timeout, history=()):
+        self.id = jid
+        self.bot = bot
+        self.schedule = parse_schedule(spec)
+        self.timeout = timeout
+        self.next_run = None
+        self.running = False
+        self.history = deque((Run(*r) for r in history), maxlen=HISTORY)
+
+    @property
+    def spec(self):
+        return self.schedule.text
+
+    def record(self):
+        return {"bot": self.bot, "spec": self.spec, "timeout": self.timeout,
+                "runs": [r.encode() for r in self.history]}
+
+
+class Scheduler:
+    def __init__(self, execute=None, on_run=None, max_sleep=60):
+        self.execute = execute  # async (job) -> returncode
+        self.on_run = on_run  # (job, run), har run/skip ke baad (persist/notify)
+        self.max_sleep = max_sleep  # clock jump / suspend ke baad bhi jaldi sambhal jaaye
+        self.jobs = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._next_id = 1
+        self._wake = None
+        self._task = None
+
+    def load(self, table):
+        for jid, v in table.items():
+            try:
+                self.add(ScheduledJob(jid, v["bot"], v["spec"], v["timeout"], v.get("runs", ())))
+            except (KeyError, ValueError) as e:
+                print(f"Schedule {jid} skip: {e}")
+
+    def create(self, bot, spec, timeout):
+        job = ScheduledJob(str(self._next_id), bot, spec, timeout)
+        return self.add(job)
+
+    def add(self, job, now=None):
+        self.jobs[job.id] = job
+        if job.id.isdigit():
+            self._next_id = max(self._next_id, int(job.id) + 1)
+        self._push(job, now or time.time())
+        return job
+
+    def remove(self, jid):
+        return self.jobs.pop(jid, None)  # heap entry lazily skip hoga; chalta run apne aap khatam
+
+    def of_bot(self, bot):
+        return [j for j in self.jobs.values() if j.bot == bot]
+
+    def _push(self, job, after):
+        job.next_run = job.schedule.next(after)
+        if job.next_run is not None:
+            heapq.heappush(self._heap, (job.next_run, next(self._seq), job.id))
+        if self._wake:
+            self._wake.set()
+
+    def start(self):
+        if not self._task:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._loop())
+
+    async def _loop(self):
+        while True:
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                when, _, jid = heapq.heappop(self._heap)
+                job = self.jobs.get(jid)
+                if job is None or job.next_run != when:
+                    continue  # removed / rescheduled
+                self._push(job, now)  # agla slot abhi se; downtime ke missed runs catch-up nahi
+                self.fire(job)
+            wait = self.max_sleep if not self._heap else min(self.max_sleep, self._heap[0][0] - now)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), max(0.05, wait))
+            except asyncio.TimeoutError:
+                pass
+
+    def fire(self, job):
+        """Job abhi chalao (schedule ya RUN NOW); pichla run chal raha ho to skip."""
+        if job.running:
+            self._record(job, Run(time.time(), 0.0, "skipped"))
+            return None
+        job.running = True
+        return asyncio.create_task(self._run(job))
+
+    async def _run(self, job):
+        started, t0 = time.time(), time.monotonic()
+        try:
+            rc = await asyncio.wait_for(self.execute(job), job.timeout)
+            result = "ok" if rc == 0 else ("skipped" if rc is None else f"exit {rc}")
+        except asyncio.TimeoutError:
+            result = "timeout"
+        except Exception as e:
+            result = f"error: {e}"[:200]
+        finally:
+            job.running = False
+        self._record(job, Run(started, time.monotonic() - t0, result))
+
+    def _record(self, job, run):
+        job.history.append(run)
+        if self.on_run and job.id in self.jobs:
+            try:
+                self.on_run(job, run)
+            except Exception as e:
+                print(f"Schedule on_run failed: {e}")
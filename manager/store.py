@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import glob
+import asyncio
+import concurrent.futures
+
+# ================= WRITE-AHEAD STATE STORE =================
+# Har mutation ek JSON line ban ke journal.log mein append hoti hai (O(1)).
+# Sealed segments (journal.<seq>.log) background mein snapshot files
+# (keys.json, user_files.json, ...) mein fold hote hain, atomic rename se.
+# Snapshot format wahi purana hai, isliye existing JSON files seedha load hoti hain.
+
+JOURNAL = "journal.log"
+
+
+def atomic_write_json(path, obj, indent=2):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(obj, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _read_table(path, kind):
+    if not os.path.exists(path):
+        return set() if kind is set else {}
+    with open(path, "r") as f:
+        raw = json.load(f)
+    return set(raw) if kind is set else raw
+
+
+def _apply(state, rec):
+    op, table, key = rec[0], rec[1], rec[2]
+    t = state.get(table)
+    if t is None:
+        return
+    if op == "set":
+        t[key] = rec[3]
+    elif op == "del":
+        t.pop(key, None)
+    elif op == "add":
+        t.add(key)
+    elif op == "rm":
+        t.discard(key)
+
+
+def replay(path, state, touched=None):
+    n = 0
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                break  # torn tail after a crash
+            _apply(state, rec)
+            if touched is not None:
+                touched.add(rec[1])
+            n += 1
+    return n
+
+
+def compact_files(data_dir, tables, segments):
+    # Pure file-based: snapshot + sealed segments -> naya snapshot. Background thread mein
+    # chalta hai (fsync + rename bhi), event loop pe nahi.
+    state = {name: _read_table(os.path.join(data_dir, fn), kind) for name, (fn, kind) in tables.items()}
+    touched = set()
+    for seg in segments:
+        replay(seg, state, touched)
+    for name in touched:
+        if name not in tables:
+            continue
+        fn, kind = tables[name]
+        data = sorted(state[name]) if kind is set else state[name]
+        atomic_write_json(os.path.join(data_dir, fn), data)
+    for seg in segments:
+        os.remove(seg)
+    return len(segments)
+
+
+def _segments(data_dir):
+    def seq(p):
+        return int(os.path.basename(p).split(".")[1])
+    return sorted(glob.glob(os.path.join(data_dir, "journal.*.log")), key=seq)
+
+
+class StateStore:
+    def __init__(self, data_dir, tables, fsync=False, compact_after=5000):
+        self.data_dir = data_dir
+        self.tables = tables
+        self.fsync = fsync
+        self.compact_after = compact_after
+        self.pending = 0
+        self._fh = None
+        self._seq = 0
+        self._wake = None
+        self._compacting = False
+        self._pool = None
+        self.observe = None  # optional (op, seconds) hook, metrics ke liye
+
+    # ---------- load ----------
+    def load(self):
+        state = {name: _read_table(os.path.join(self.data_dir, fn), kind)
+                 for name, (fn, kind) in self.tables.items()}
+        for seg in _segments(self.data_dir):
+            self.pending += replay(seg, state)
+            self._seq = max(self._seq, int(os.path.basename(seg).split(".")[1]))
+        live = os.path.join(self.data_dir, JOURNAL)
+        if os.path.exists(live):
+            self.pending += replay(live, state)
+            self._seal()
+        self._open()
+        return state
+
+    def _open(self):
+        self._fh = open(os.path.join(self.data_dir, JOURNAL), "a", buffering=1)
+
+    def _seal(self):
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+        live = os.path.join(self.data_dir, JOURNAL)
+        if not os.path.exists(live) or os.path.getsize(live) == 0:
+            return
+        self._seq += 1
+        os.replace(live, os.path.join(self.data_dir, f"journal.{self._seq}.log"))
+
+    # ---------- mutations ----------
+    def _append(self, rec):
+        t0 = time.perf_counter()
+        self._fh.write(json.dumps(rec, separators=(",", ":"), ensure_ascii=False) + "\n")
+        if self.fsync:
+            os.fsync(self._fh.fileno())
+        if self.observe:
+            self.observe("append", time.perf_counter() - t0)
+        self.pending += 1
+        if self.pending >= self.compact_after and self._wake is not None:
+            self._wake.set()
+
+    def put(self, table, key, value):
+        self._append(["set", table, key, value])
+
+    def delete(self, table, key):
+        self._append(["del", table, key])
+
+    def add(self, table, member):
+        self._append(["add", table, member])
+
+    def discard(self, table, member):
+        self._append(["rm", table, member])
+
+    # ---------- compaction ----------
+    def _executor(self):
+        # Thread, process pool nahi: fork hua worker manager ke saare fds (bot logs,
+        # sockets, warm spares ke stdin pipes) inherit karke rakhta tha - retired spare
+        # ko EOF kabhi nahi milta. spawn/forkserver hosting.py ko dobara chala dete.
+        if self._pool is None:
+            self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="compact")
+        return self._pool
+
+    async def compact(self):
+        if self._compacting:
+            return 0
+        self._compacting = True
+        try:
+            self._seal()
+            self._open()
+            self.pending = 0
+            segments = _segments(self.data_dir)
+            if not segments:
+                return 0
+            loop = asyncio.get_running_loop()
+            t0 = time.perf_counter()
+            n = await loop.run_in_executor(
+                self._executor(), compact_files, self.data_dir, self.tables, segments
+            )
+            if self.observe:
+                self.observe("compact", time.perf_counter() - t0)
+            return n
+        finally:
+            self._compacting = False
+
+    async def run_compactor(self, interval=300):
+        self._wake = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self.pending:
+                try:
+                    await self.compact()
+                except Exception as e:
+                    print(f"State compaction failed: {e}")
+
+    def close(self):
+        if self._pool:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        self._seal()
+        segments = _segments(self.data_dir)
+        if segments:
+            compact_files(self.data_dir, self.tables, segments)
@@ -0,0 +1,192 @@
+import os
+import time
+import signal
+import asyncio
+from collections import deque
+
+from manager.procstats import start_time
+
+# ================= PROCESS SUPERVISOR =================
+# Har bot ke exit ka turant pata: Linux 5.3+ pe pidfd (event loop reader),
+# warna SIGCHLD handler + 5s poll safety net. proc.poll() child ko reap karta hai,
+# isliye zombies nahi bachte. Crash pe optional auto-restart exponential backoff
+# ke saath; window ke andar crash_limit crashes = crash loop, restart band.
+# Exit 0 crash nahi: script ka kaam khatam (FINISHED), restart / crash count nahi.
+# Stop: process group ko SIGTERM, timeout ke baad SIGKILL.
+
+# on_exit(bot, pid, rc, state, delay) ka state
+STOPPED = "stopped"  # stop() se
+FINISHED = "finished"  # khud exit 0
+CRASHED = "crashed"
+
+
+class Watch:
+    __slots__ = ("bot", "proc", "pid", "fd", "returncode", "stopping", "autorestart", "started", "exited")
+
+    def __init__(self, bot, proc, pid, autorestart):
+        self.bot = bot
+        self.proc = proc
+        self.pid = pid
+        self.fd = None
+        self.returncode = None
+        self.stopping = False
+        self.autorestart = autorestart
+        self.started = time.time()
+        self.exited = asyncio.Event()
+
+    def poll(self):
+        if self.proc is not None:
+            return self.proc.poll()
+        # adopted (non-child) process: exit code nahi milta, sirf zinda hai ya nahi
+        # (zombie bhi mara hua; reap init karega)
+        return None if start_time(self.pid) is not None else -1
+
+
+class Supervisor:
+    def __init__(self, on_exit, respawn, stop_timeout=10, backoff_base=2, backoff_max=300,
+                 crash_limit=5, crash_window=600, poll_interval=5):
+        self.on_exit = on_exit
+        self.respawn = respawn
+        self.stop_timeout = stop_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.crash_limit = crash_limit
+        self.crash_window = crash_window
+        self.poll_interval = poll_interval
+        self.watched = {}
+        self.crashes = {}
+        self.restarts = {}
+        self._loop = None
+        self._task = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        try:
+            self._loop.add_signal_handler(signal.SIGCHLD, self.check_all)
+        except (NotImplementedError, RuntimeError, ValueError):
+            pass
+        if not self._task:
+            self._task = asyncio.create_task(self._poll_loop())
+
+    # ---------- watching ----------
+    def watch(self, bot, proc=None, pid=None, autorestart=False):
+        w = Watch(bot, proc, proc.pid if proc else pid, autorestart)
+        self.watched[bot] = w
+        pidfd_open = getattr(os, "pidfd_open", None)
+        if pidfd_open and self._loop:
+            try:
+                w.fd = pidfd_open(w.pid)
+                self._loop.add_reader(w.fd, self._on_pidfd, w)
+            except OSError:
+                w.fd = None  # purana kernel / seccomp -> SIGCHLD + poll
+        if w.poll() is not None:  # start hote hi mar gaya
+            self._exited(w)
+        return w
+
+    def _on_pidfd(self, w):
+        self._close_fd(w)
+        if w.poll() is None and w.proc is not None:
+            try:
+                w.proc.wait(timeout=1)
+            except Exception:
+                pass
+        self._exited(w)
+
+    def _close_fd(self, w):
+        if w.fd is not None:
+            self._loop.remove_reader(w.fd)
+            os.close(w.fd)
+            w.fd = None
+
+    def check_all(self):
+        for w in list(self.watched.values()):
+            if w.poll() is not None:
+                self._close_fd(w)
+                self._exited(w)
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            self.check_all()
+
+    def is_alive(self, bot):
+        w = self.watched.get(bot)
+        return bool(w) and w.returncode is None
+
+    # ---------- exit handling ----------
+    def _exited(self, w):
+        if w.exited.is_set():
+            return
+        rc = w.proc.returncode if w.proc is not None else w.poll()
+        w.returncode = rc
+        w.exited.set()
+        if self.watched.get(w.bot) is w:
+            del self.watched[w.bot]
+        if w.stopping or rc == 0:
+            self._kill_group(w, signal.SIGKILL)  # bache hue grandchildren
+            state = STOPPED if w.stopping else FINISHED
+            asyncio.ensure_future(self.on_exit(w.bot, w.pid, rc, state, None))
+            return
+        now = time.monotonic()
+        hist = self.crashes.setdefault(w.bot, deque())
+        hist.append(now)
+        while hist and hist[0] < now - self.crash_window:
+            hist.popleft()
+        delay = None
+        if w.autorestart:
+            if len(hist) >= self.crash_limit:
+                delay = -1  # crash loop
+            else:
+                delay = min(self.backoff_base * 2 ** (len(hist) - 1), self.backoff_max)
+                self.restarts[w.bot] = asyncio.ensure_future(self._restart_later(w.bot, delay))
+        asyncio.ensure_future(self.on_exit(w.bot, w.pid, rc, CRASHED, delay))
+
+    async def _restart_later(self, bot, delay):
+        try:
+            await asyncio.sleep(delay)
+            self.restarts.pop(bot, None)
+            await self.respawn(bot)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"Respawn {bot} failed: {e}")
+
+    def restart_pending(self, bot):
+        return bot in self.restarts
+
+    def cancel_restart(self, bot):
+        task = self.restarts.pop(bot, None)
+        if task:
+            task.cancel()
+
+    def reset_crashes(self, bot):
+        self.crashes.pop(bot, None)
+
+    # ---------- graceful stop ----------
+    def _kill_group(self, w, sig):
+        try:
+            os.killpg(w.pid, sig)  # start_new_session=True -> pgid == pid
+        except ProcessLookupError:
+            pass
+        except PermissionError:
+            try:
+                os.kill(w.pid, sig)
+            except OSError:
+                pass
+
+    async def stop(self, bot, timeout=None):
+        self.cancel_restart(bot)
+        w = self.watched.get(bot)
+        if not w:
+            return None
+        w.stopping = True
+        self._kill_group(w, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(w.exited.wait(), timeout or self.stop_timeout)
+        except asyncio.TimeoutError:
+            self._kill_group(w, signal.SIGKILL)
+            try:
+                await asyncio.wait_for(w.exited.wait(), 5)
+            except asyncio.TimeoutError:
+                self.check_all()
+        return w.returncode
@@ -0,0 +1,48 @@
+import os
+import sys
+import json
+import runpy
+import importlib
+
+# ================= PRE-WARMED INTERPRETER (child side) =================
+# `python -u -m manager.warmstart mod1,mod2` - common libraries pehle se import
+# karke stdin pe ek handoff line ka wait: {"path", "log", "limits"}. Handoff pe
+# log file ko stdout/stderr banao, limits lagao, aur script runpy se __main__
+# ki tarah chalao. stdin EOF (pool band) = bina kuch chalaye exit.
+
+from manager.limits import apply
+
+
+def main():
+    for name in filter(None, (sys.argv[1] if len(sys.argv) > 1 else "").split(",")):
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass  # is interpreter/venv mein nahi hai -> bot khud import karega
+
+    line = sys.stdin.readline()
+    if not line:
+        return
+    req = json.loads(line)
+    path = req["path"]
+
+    fd = os.open(req["log"], os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    os.dup2(fd, 1)
+    os.dup2(fd, 2)
+    os.close(fd)
+    null = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(null, 0)
+    os.close(null)
+    apply(req["limits"])
+
+    # `python -u path` jaisa hi environment: argv, sys.path[0] = script dir, aur
+    # hamare modules sys.modules se bahar (user ka apna "manager.py" shadow na ho)
+    sys.argv = [path]
+    sys.path[0] = os.path.dirname(os.path.abspath(path))
+    for name in [m for m in sys.modules if m == "manager" or m.startswith("manager.")]:
+        del sys.modules[name]
+    runpy.run_path(path, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
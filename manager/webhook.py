@@ -0,0 +1,136 @@
+import hmac
+import signal
+import asyncio
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+# ================= UPDATES: WEBHOOK + CONCURRENCY =================
+# PerUserProcessor: alag users ke updates parallel chalte hain, ek hi user ke
+# updates arrival order mein (per-user lock) - ConversationHandler aur
+# "pehle upload phir button" jaise flows safe rehte hain.
+# run_webhook: PTB ka tornado server nahi, apna aiohttp server (metrics wala hi
+# stack) jo secret token check karke Update seedha app.update_queue mein daalta hai.
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def update_key(update):
+    """Serialization key: user, warna chat; None = kisi lock ki zaroorat nahi."""
+    if not isinstance(update, Update):
+        return None
+    if update.effective_user is not None:
+        return update.effective_user.id
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    return None
+
+
+UNBOUNDED = 1 << 30
+
+
+class PerUserProcessor(BaseUpdateProcessor):
+    def __init__(self, max_concurrent_updates=64):
+        # Base class ka semaphore user lock se pehle milta hai: ek user ka backlog saare
+        # slots gher leta aur baaki users uske peeche. Isliye base ko unbounded, asli
+        # limit apna semaphore jo user ka lock milne ke baad liya jaata hai.
+        super().__init__(UNBOUNDED)
+        self.limit = max_concurrent_updates
+        self._slots = asyncio.Semaphore(max_concurrent_updates)
+        self._locks = {}  # key -> [Lock, waiters]; koi waiter nahi to entry hata do
+
+    async def do_process_update(self, update, coroutine):
+        key = update_key(update)
+        if key is None:
+            async with self._slots:
+                await coroutine
+            return
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0], self._slots:
+                await coroutine
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def active_users(self):
+        return len(self._locks)
+
+
+async def serve(app, listen, path, secret=None):
+    """POST path pe updates lo -> app.update_queue. aiohttp runner lautata hai."""
+    host, _, port = listen.rpartition(":")
+
+    async def handle(request):
+        if secret and not hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), secret):
+            return web.Response(status=403)
+        try:
+            data = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+        # Sirf queue karo aur turant 200: handler ka kaam Telegram ka request
+        # hold nahi karta (warna woh retry/backoff karta hai)
+        await app.update_queue.put(Update.de_json(data, app.bot))
+        return web.Response()
+
+    webapp = web.Application()
+    webapp.router.add_post(path, handle)
+    runner = web.AppRunner(webapp, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host or "0.0.0.0", int(port))
+    await site.start()
+    return runner
+
+
+def run_webhook(app, listen, path, secret=None, url=None, allowed_updates=None):
+    """run_polling jaisa lifecycle (post_init/post_shutdown ke saath), webhook se.
+
+    url diya ho to set_webhook bhi yahin. Stop pe webhook delete nahi hota:
+    restart ke beech aaye updates Telegram ke paas queue rehte hain.
+    """
+    if web is None:
+        raise RuntimeError("webhook mode ke liye aiohttp chahiye (pip install aiohttp)")
+
+    async def main():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        runner = None
+        await app.initialize()
+        try:
+            if app.post_init:
+                await app.post_init(app)
+            await app.start()
+            runner = await serve(app, listen, path, secret)
+            if url:
+                await app.bot.set_webhook(url, secret_token=secret, allowed_updates=allowed_updates)
+            print(f"🌐 Webhook listening on {listen}{path}")
+            await stop.wait()
+        finally:
+            if runner:
+                await runner.cleanup()
+            if app.running:
+                await app.stop()
+            if app.post_stop:
+                await app.post_stop(app)
+            await app.shutdown()
+            if app.post_shutdown:
+                await app.post_shutdown(app)
+
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+import json
+import time
+import subprocess
+from collections import deque
+
+# ================= WARM INTERPRETER POOL =================
+# Har start pe naya `python -u bot.py` = interpreter startup + telegram/aiohttp
+# jaise heavy imports, low-end hosts pe seconds. Pool kuch spare interpreters
+# (manager.warmstart, preload imports ke saath) apne process group mein pehle se
+# chala ke rakhta hai; start pe ek spare ko script path handoff hota hai. Spare
+# normal child process hai, isliye supervisor / stop / restore same rehte hain.
+# Spares interpreter (venv) ke hisaab se; total `size` se zyada nahi.
+
+
+class WarmPool:
+    def __init__(self, size, preload=()):
+        self.size = size
+        self.preload = list(preload)
+        self.spares = {}  # python -> deque[(Popen, born)]
+        self.retired = []  # stdin band, exit ka wait; poll() se reap (zombie na bane)
+        self.hits = 0
+        self.misses = 0
+
+    def _spawn(self, python):
+        return subprocess.Popen(
+            [python, "-u", "-m", "manager.warmstart", ",".join(self.preload)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,  # pgid == pid, bilkul cold start jaisa
+        )
+
+    def count(self):
+        return sum(len(q) for q in self.spares.values())
+
+    def reap(self):
+        self.retired = [p for p in self.retired if p.poll() is None]
+
+    def fill(self, python):
+        """python ke liye ek spare; total size se upar ho to sabse purana (doosre python ka) hatao."""
+        self.reap()
+        if self.size <= 0:
+            return
+        self.spares.setdefault(python, deque()).append((self._spawn(python), time.monotonic()))
+        while self.count() > self.size:
+            oldest = min((q[0][1], p) for p, q in self.spares.items() if q and (p != python or len(q) > 1))
+            self._retire(self.spares[oldest[1]].popleft()[0])
+
+    def take(self, python):
+        """Zinda spare (aur uski jagah naya spawn) ya None = cold start karo."""
+        q = self.spares.get(python)
+        while q:
+            proc, _ = q.popleft()
+            if proc.poll() is None:  # mara hua spare yahin reap ho jaata hai
+                self.hits += 1
+                self.fill(python)
+                return proc
+        self.misses += 1
+        self.fill(python)  # agli baar ke liye
+        return None
+
+    @staticmethod
+    def handoff(proc, path, log, limits):
+        # OSError/BrokenPipe = spare mar chuka; caller cold start pe gir jaaye
+        proc.stdin.write(json.dumps({"path": path, "log": log, "limits": limits}).encode() + b"\n")
+        proc.stdin.close()
+
+    def _retire(self, proc):
+        try:
+            proc.stdin.close()  # EOF -> spare bina script chalaye exit
+        except OSError:
+            pass
+        self.retired.append(proc)
+
+    def close(self):
+        for q in self.spares.values():
+            for proc, _ in q:
+                self._retire(proc)
+        self.spares.clear()
+        for proc in self.retired:
+            try:
+                proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        self.retired = []
+
+    def stats(self):
+        return {"spare": self.count(), "hit": self.hits, "miss": self.misses}
@@ -0,0 +1,60 @@
+import sys
+import asyncio
+import subprocess
+import unittest
+
+from manager.supervisor import Supervisor, STOPPED, FINISHED, CRASHED
+
+
+def spawn(code):
+    return subprocess.Popen([sys.executable, "-c", code], start_new_session=True)
+
+
+class SupervisorExitTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.exits = []
+        self.respawned = []
+
+        async def on_exit(bot, pid, rc, state, delay):
+            self.exits.append((bot, rc, state, delay))
+
+        async def respawn(bot):
+            self.respawned.append(bot)
+
+        self.sup = Supervisor(on_exit, respawn, backoff_base=0.05, poll_interval=0.05)
+        self.sup.start()
+
+    async def run_until_exit(self, code, autorestart=True):
+        w = self.sup.watch("b1", spawn(code), autorestart=autorestart)
+        await asyncio.wait_for(w.exited.wait(), 10)
+        await asyncio.sleep(0.2)  # on_exit + (agar ho) restart backoff
+        return w
+
+    async def test_clean_exit_is_finished_not_crash(self):
+        w = await self.run_until_exit("pass")
+        self.assertEqual(w.returncode, 0)
+        self.assertEqual(self.exits, [("b1", 0, FINISHED, None)])
+        self.assertFalse(self.sup.restart_pending("b1"))
+        self.assertEqual(self.respawned, [])
+        self.assertNotIn("b1", self.sup.crashes)
+
+    async def test_nonzero_exit_is_crash_with_restart(self):
+        await self.run_until_exit("raise SystemExit(3)")
+        self.assertEqual(len(self.exits), 1)
+        bot, rc, state, delay = self.exits[0]
+        self.assertEqual((bot, rc, state), ("b1", 3, CRASHED))
+        self.assertIsNotNone(delay)
+        self.assertEqual(self.respawned, ["b1"])
+        self.assertEqual(len(self.sup.crashes["b1"]), 1)
+
+    async def test_requested_stop(self):
+        self.sup.watch("b1", spawn("import time; time.sleep(30)"), autorestart=True)
+        await self.sup.stop("b1", timeout=5)
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(self.exits), 1)
+        self.assertEqual(self.exits[0][2], STOPPED)
+        self.assertEqual(self.respawned, [])
+
+
+if __name__ == "__main__":
+    unittest.main()